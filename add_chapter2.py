@@ -2,8 +2,9 @@
 Add Chapter 2: Power Series to Complex Analysis book
 """
 from app import create_app
+from catalog import bump_catalog_version
 from models import db, Book, Chapter, Exercise
-import math
+from scoring import exercise_points
 
 def add_chapter2():
     app = create_app()
@@ -69,11 +70,8 @@ def add_chapter2():
                 else:
                     difficulty = 'hard'
                 
-                # Set base points based on difficulty
-                base_points = {'easy': 10, 'medium': 20, 'hard': 30}
-                # Apply chapter multiplier: Chapter 1 = 1.0, Chapter 2 = 1.05, etc.
-                chapter_multiplier = 1 + (0.05 * (2 - 1))  # Chapter 2 = 1.05
-                points = math.ceil(base_points[difficulty] * chapter_multiplier)
+                # Base points with the chapter multiplier (see scoring.py)
+                points = exercise_points(difficulty, 2)
                 
                 exercise = Exercise(
                     chapter_id=chapter2.id,
@@ -87,6 +85,7 @@ def add_chapter2():
                 print(f"    - Exercise 2.{section_num}.{ex_num} ({difficulty}) - {points} pts")
         
         # Commit all changes
+        bump_catalog_version()
         db.session.commit()
         print(f"\nSuccessfully added Chapter 2 to '{book.title}'!")
         print(f"  Chapter 2 with 7 sections")
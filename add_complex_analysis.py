@@ -2,6 +2,7 @@
 Add Complex Analysis by Serge Lang (4th Edition) to the database.
 """
 from app import create_app
+from catalog import bump_catalog_version
 from models import db, Book, Chapter, Exercise
 
 def add_complex_analysis():
@@ -79,6 +80,7 @@ def add_complex_analysis():
                 exercise_counter += 1
         
         # Commit all changes
+        bump_catalog_version()
         db.session.commit()
         print(f"\n✓ Successfully added '{book.title}' with Chapter 1 and all subchapters!")
         print(f"  Total exercises in Chapter 1: {exercise_counter - 1}")
@@ -5,7 +5,9 @@ that represents "reading completion" for that section. Users can upload
 a file (e.g., notes, summary) to mark the section as read and earn points.
 """
 from app import create_app
+from catalog import bump_catalog_version
 from models import db, Chapter, Exercise
+from scoring import chapter_points
 
 app = create_app()
 
@@ -15,8 +17,7 @@ with app.app_context():
     exercises_added = 0
     
     for chapter in chapters:
-        chapter_multiplier = 1 + (0.05 * (chapter.number - 1))
-        reading_points = int(round(25 * chapter_multiplier))
+        reading_points = chapter_points(chapter.number).reading
         
         for section in range(1, 8):
             # Check if section has any exercises
@@ -39,6 +40,7 @@ with app.app_context():
                 print(f'Added reading exercise to Chapter {chapter.number}, Section {section} ({reading_points} pts)')
     
     if exercises_added > 0:
+        bump_catalog_version()
         db.session.commit()
         print(f'\n✅ Successfully added {exercises_added} reading completion exercises!')
     else:
@@ -2,8 +2,9 @@
 Add section field to exercises and fix Complex Analysis structure with proper section numbering.
 """
 from app import create_app
+from catalog import bump_catalog_version
 from models import db, Book, Chapter, Exercise
-import math
+from scoring import exercise_points
 
 def add_section_to_exercises():
     """Add section column to exercises table and restructure Complex Analysis."""
@@ -90,11 +91,8 @@ def add_section_to_exercises():
                 else:
                     difficulty = 'hard'
                 
-                # Set base points based on difficulty
-                base_points = {'easy': 10, 'medium': 20, 'hard': 30}
-                # Apply chapter multiplier: Chapter 1 = 1.0, Chapter 2 = 1.05, etc.
-                chapter_multiplier = 1 + (0.05 * (1 - 1))  # Chapter 1
-                points = math.ceil(base_points[difficulty] * chapter_multiplier)
+                # Base points with the chapter multiplier (see scoring.py)
+                points = exercise_points(difficulty, 1)
                 
                 exercise = Exercise(
                     chapter_id=chapter1.id,
@@ -108,6 +106,7 @@ def add_section_to_exercises():
                 print(f"    - Exercise 1.{section_num}.{ex_num} ({difficulty}) - {points} pts")
         
         # Commit all changes
+        bump_catalog_version()
         db.session.commit()
         print(f"\nSuccessfully created '{book.title}'!")
         print(f"  Chapter 1 with 7 sections")
@@ -1,15 +1,30 @@
 import os
-import json
 from datetime import datetime, date, timedelta
-from flask import Flask, render_template, redirect, url_for, flash, request, send_from_directory, session
+from flask import Flask, render_template, redirect, url_for, flash, request, send_from_directory, session, abort
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
-from sqlalchemy import func
+from sqlalchemy.orm import joinedload, contains_eager
 
 from config import Config
 from models import db, User, Book, Chapter, Exercise, Submission, WeeklyPlan, ActivityLog
 from forms import RegistrationForm, LoginForm, WeeklyPlanForm
 from companions import get_login_message, get_upload_message
+from leaderboard import (get_entry, record_submissions, remove_submissions, sync_points, get_leaderboard,
+                         get_leaderboard_page, get_user_rank, parse_cursor, format_cursor)
+from rollups import record_activity, remove_book_activity, get_period_stats
+from submissions import score_batch, insert_submissions
+from jobs import enqueue
+from dbutils import insert_or_increment, insert_ignore
+from ledger import record_points, submission_events, READING, REVERSAL, PLAN_RESET
+from plan_progress import PlanProgressService
+from database import init_database
+from routing import init_routing, reads_from_replica, replica_reads
+from querystats import init_query_stats
+from metrics import init_metrics, UPLOAD_SIZE, SUBMITTED_EXERCISES
+from catalog import init_catalog, get_catalog
+from completions import add_completions, clear_completions, completed_exercise_ids, book_progress
+from book_tree import build_book_tree
+from badges import get_user_badges, award_badges
 
 
 def create_app(config_class=Config):
@@ -23,6 +38,11 @@ def create_app(config_class=Config):
     
     # Initialize extensions
     db.init_app(app)
+    init_database(app)
+    init_routing(app)
+    init_query_stats(app)
+    init_metrics(app)
+    init_catalog(app)
     
     # Flask-Login setup
     login_manager = LoginManager()
@@ -35,97 +55,48 @@ def create_app(config_class=Config):
         return User.query.get(int(user_id))
     
     # Helper functions
+    def get_book_or_404(slug):
+        """Look a book up in the catalog snapshot by slug."""
+        book = get_catalog().book_by_slug(slug)
+        if book is None:
+            abort(404)
+        return book
+    
     def allowed_file(filename):
         """Check if file extension is allowed."""
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
     
-    def get_user_badges(user):
-        """Calculate and return badges for a user."""
-        badges = []
-        total_exercises = user.get_total_exercises_completed()
-        
-        # First Steps badge
-        if total_exercises >= 1:
-            badges.append({
-                'name': 'First Steps',
-                'description': 'Completed your first exercise',
-                'icon': '🎯',
-                'color': 'success'
-            })
-        
-        # Getting Serious badge
-        if total_exercises >= 20:
-            badges.append({
-                'name': 'Getting Serious',
-                'description': 'Completed 20+ exercises',
-                'icon': '📚',
-                'color': 'primary'
-            })
-        
-        # Book Grinder badge
-        if total_exercises >= 100:
-            badges.append({
-                'name': 'Book Grinder',
-                'description': 'Completed 100+ exercises',
-                'icon': '🔥',
-                'color': 'danger'
-            })
-        
-        # One-Week Streak badge
-        if user.streak_days >= 7:
-            badges.append({
-                'name': 'One-Week Streak',
-                'description': '7+ day streak',
-                'icon': '⚡',
-                'color': 'warning'
-            })
-        
-        # Chapter Finisher badge - check if user completed any full chapter
-        # Get all chapters
-        chapters = Chapter.query.all()
-        completed_chapters = None
-        for chapter in chapters:
-            total_in_chapter = chapter.exercises.count()
-            completed_in_chapter = db.session.query(func.count(Submission.id))\
-                .join(Exercise).filter(Exercise.chapter_id == chapter.id, Submission.user_id == user.id).scalar()
-            if total_in_chapter > 0 and completed_in_chapter == total_in_chapter:
-                completed_chapters = chapter
-                break
-        
-        if completed_chapters:
-            badges.append({
-                'name': 'Chapter Finisher',
-                'description': 'Completed a full chapter',
-                'icon': '🏆',
-                'color': 'info'
-            })
-        
-        return badges
-    
-    def update_weekly_plans_on_completion(user_id, book_id):
-        """Check if any chapter is completed and update weekly plans to next chapter."""
-        import json
+    def update_weekly_plans_on_completion(user_id, book_id=None):
+        """Check if any chapter is completed and update weekly plans to next chapter.
         
-        # Get active weekly plans for this user and book
+        Covers the user's active plans for one book, or for all books when
+        `book_id` is None; their progress is counted in a single query.
+        """
+        # Get active chapter-based weekly plans for this user (and book)
         active_plans = WeeklyPlan.query.filter_by(
             user_id=user_id,
-            book_id=book_id,
             completed=False
-        ).filter(WeeklyPlan.end_date >= date.today()).all()
+        ).filter(
+            WeeklyPlan.end_date >= date.today(),
+            # Only auto-progress for chapterwise and subchapterwise plans
+            WeeklyPlan.plan_mode.in_(['chapterwise', 'subchapterwise']),
+            WeeklyPlan.chapter_id.isnot(None)
+        )
+        if book_id is not None:
+            active_plans = active_plans.filter_by(book_id=book_id)
+        active_plans = active_plans.all()
+        progress = WeeklyPlan.count_progress([plan.id for plan in active_plans])
         
         for plan in active_plans:
-            # Only auto-progress for chapterwise and subchapterwise plans
-            if plan.plan_mode not in ['chapterwise', 'subchapterwise']:
-                continue
-            
             # Check if current chapter is 100% complete
-            if plan.chapter_id and plan.get_progress() >= 100:
+            completed_count, target_count = progress[plan.id]
+            if target_count and completed_count >= target_count:
                 # Find next chapter
                 current_chapter = Chapter.query.get(plan.chapter_id)
                 if current_chapter:
                     next_chapter = Chapter.query.filter_by(
-                        book_id=book_id,
+                        book_id=plan.book_id,
                         number=current_chapter.number + 1
                     ).first()
                     
@@ -137,9 +108,7 @@ def create_app(config_class=Config):
                         # Update target exercises to next chapter's exercises
                         if plan.plan_mode == 'chapterwise':
                             # All exercises in next chapter
-                            next_exercises = Exercise.query.filter_by(chapter_id=next_chapter.id).all()
-                            exercise_ids = [ex.id for ex in next_exercises]
-                            plan.target_exercises = json.dumps(exercise_ids)
+                            plan.target_exercises = Exercise.query.filter_by(chapter_id=next_chapter.id).all()
                         elif plan.plan_mode == 'subchapterwise':
                             # First section of next chapter
                             next_exercises = Exercise.query.filter_by(
@@ -147,235 +116,7 @@ def create_app(config_class=Config):
                                 section=1
                             ).all()
                             if next_exercises:
-                                exercise_ids = [ex.id for ex in next_exercises]
-                                plan.target_exercises = json.dumps(exercise_ids)
-    
-    def simulate_fake_user_progress(real_user_id, exercises_submitted, points_earned):
-        """Simulate progress for fake users when a real user submits exercises."""
-        import random
-        from datetime import datetime, timedelta
-        
-        # Don't simulate if the real user is fake
-        real_user = User.query.get(real_user_id)
-        if not real_user or real_user.is_fake:
-            return
-        
-        # Get all fake users
-        fake_users = User.query.filter_by(is_fake=True).all()
-        if not fake_users:
-            return
-        
-        # Get all available exercises (that haven't been completed by each fake user)
-        all_exercises = Exercise.query.all()
-        today = date.today()
-        
-        for fake_user in fake_users:
-            # Determine how many exercises this fake user will complete
-            # Based on their competitiveness (10-90% of real user's progress)
-            base_percentage = fake_user.competitiveness
-            # Add some randomness (±15% variation)
-            actual_percentage = random.uniform(max(0.1, base_percentage - 0.15), min(0.9, base_percentage + 0.15))
-            
-            # Calculate number of exercises for this fake user
-            num_exercises = max(1, int(exercises_submitted * actual_percentage))
-            
-            # Get exercises this fake user hasn't completed yet
-            completed_exercise_ids = db.session.query(Submission.exercise_id)\
-                .filter(Submission.user_id == fake_user.id).all()
-            completed_exercise_ids = [ex_id[0] for ex_id in completed_exercise_ids]
-            
-            available_exercises = [ex for ex in all_exercises if ex.id not in completed_exercise_ids]
-            
-            if not available_exercises:
-                continue  # This fake user has completed everything
-            
-            # Randomly select exercises to "complete"
-            exercises_to_complete = random.sample(
-                available_exercises, 
-                min(num_exercises, len(available_exercises))
-            )
-            
-            fake_points_earned = 0
-            for exercise in exercises_to_complete:
-                # Calculate points for this exercise (simplified - no bonuses for fake users)
-                points = exercise.points
-                
-                # Create submission with slight time variation (within last 6 hours)
-                hours_ago = random.randint(0, 6)
-                minutes_ago = random.randint(0, 59)
-                submission_time = datetime.utcnow() - timedelta(hours=hours_ago, minutes=minutes_ago)
-                
-                submission = Submission(
-                    user_id=fake_user.id,
-                    exercise_id=exercise.id,
-                    filename=f'ai_solution_{fake_user.id}_{exercise.id}.pdf',
-                    created_at=submission_time,
-                    status='submitted',
-                    points_earned=points
-                )
-                db.session.add(submission)
-                fake_points_earned += points
-            
-            # Update fake user's total points
-            if not fake_user.total_points:
-                fake_user.total_points = 0
-            fake_user.total_points += fake_points_earned
-            
-            # Update activity log for fake user
-            activity = ActivityLog.query.filter_by(
-                user_id=fake_user.id,
-                date=today
-            ).first()
-            
-            if activity:
-                activity.exercises_done += len(exercises_to_complete)
-            else:
-                activity = ActivityLog(
-                    user_id=fake_user.id,
-                    date=today,
-                    exercises_done=len(exercises_to_complete)
-                )
-                db.session.add(activity)
-            
-            # Small chance to update streak
-            if random.random() < 0.3:  # 30% chance
-                fake_user.streak_days = min(fake_user.streak_days + 1, 30)
-                fake_user.longest_streak = max(fake_user.longest_streak, fake_user.streak_days)
-    
-    def create_random_fake_users():
-        """Create 1-5 random new fake users with activity."""
-        import random
-        from datetime import datetime, timedelta
-        
-        # List of possible names for generating fake users
-        first_names = [
-            'Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Ethan', 'Sophia', 'Mason',
-            'Isabella', 'William', 'Mia', 'James', 'Charlotte', 'Benjamin', 'Amelia',
-            'Lucas', 'Harper', 'Henry', 'Evelyn', 'Alexander', 'Abigail', 'Michael',
-            'Emily', 'Daniel', 'Elizabeth', 'Matthew', 'Sofia', 'Jackson', 'Avery',
-            'Sebastian', 'Ella', 'David', 'Scarlett', 'Joseph', 'Grace', 'Samuel',
-            'Chloe', 'John', 'Victoria', 'Owen', 'Riley', 'Dylan', 'Aria', 'Luke',
-            'Lily', 'Gabriel', 'Aubrey', 'Anthony', 'Zoey', 'Isaac', 'Penelope'
-        ]
-        
-        suffixes = [
-            'math', 'brain', 'genius', 'pro', 'ace', 'star', 'master', 'champ',
-            'whiz', 'solver', 'ninja', 'legend', 'wizard', 'expert', 'scholar',
-            'student', 'learner', 'thinker', 'keen', 'smart', 'bright', 'swift'
-        ]
-        
-        # Randomly decide how many users to create (1-5)
-        num_users = random.randint(1, 5)
-        
-        # Get all exercises for assigning initial activity
-        all_exercises = Exercise.query.all()
-        if not all_exercises:
-            return 0
-        
-        created_count = 0
-        today = date.today()
-        
-        for _ in range(num_users):
-            # Generate unique username
-            attempts = 0
-            while attempts < 50:  # Try up to 50 times to find unique username
-                first_name = random.choice(first_names)
-                suffix = random.choice(suffixes)
-                username = f"{first_name.lower()}_{suffix}"
-                email = f"{username}@example.com"
-                
-                # Check if username exists
-                existing = User.query.filter_by(username=username).first()
-                if not existing:
-                    break
-                attempts += 1
-            else:
-                # Couldn't find unique username after 50 attempts, skip
-                continue
-            
-            # Determine competitiveness tier (same distribution as before)
-            tier_roll = random.random()
-            if tier_roll < 0.33:  # 33% high
-                competitiveness = random.uniform(0.7, 0.9)
-            elif tier_roll < 0.53:  # 20% low
-                competitiveness = random.uniform(0.1, 0.3)
-            else:  # 47% medium
-                competitiveness = random.uniform(0.4, 0.6)
-            
-            # Randomly assign team
-            team = random.choice(['red', 'blue', 'green'])
-            
-            # Randomly assign companion (1-5)
-            companion_id = random.randint(1, 5)
-            
-            # Create user
-            user = User(
-                username=username,
-                nickname=first_name,
-                email=email,
-                public_profile=True,
-                public_stats=True,
-                public_activity=True,
-                show_leaderboard=True,
-                is_fake=True,
-                competitiveness=competitiveness,
-                team=team,
-                companion_id=companion_id
-            )
-            user.set_password('password123')
-            
-            # Random join date (joined recently - within last 7 days)
-            days_ago = random.randint(0, 7)
-            user.date_joined = datetime.utcnow() - timedelta(days=days_ago)
-            
-            db.session.add(user)
-            db.session.flush()  # Get user.id
-            
-            # Give them some initial activity (1-15 exercises completed)
-            num_initial_exercises = random.randint(1, 15)
-            selected_exercises = random.sample(all_exercises, min(num_initial_exercises, len(all_exercises)))
-            
-            total_points = 0
-            for exercise in selected_exercises:
-                # Random submission date (within their lifetime)
-                days_since_join = (datetime.utcnow() - user.date_joined).days
-                if days_since_join > 0:
-                    submission_days_ago = random.randint(0, days_since_join)
-                else:
-                    submission_days_ago = 0
-                
-                submission_date = datetime.utcnow() - timedelta(days=submission_days_ago)
-                
-                submission = Submission(
-                    user_id=user.id,
-                    exercise_id=exercise.id,
-                    filename=f'ai_solution_{user.id}_{exercise.id}.pdf',
-                    created_at=submission_date,
-                    status='submitted',
-                    points_earned=exercise.points
-                )
-                db.session.add(submission)
-                total_points += exercise.points
-            
-            # Set total points
-            user.total_points = total_points
-            
-            # Create activity log for today if they did any exercises today
-            if random.random() < 0.5:  # 50% chance they were active today
-                activity = ActivityLog(
-                    user_id=user.id,
-                    date=today,
-                    exercises_done=random.randint(1, 3)
-                )
-                db.session.add(activity)
-            
-            # Random streak
-            user.streak_days = random.randint(0, 10)
-            user.longest_streak = random.randint(user.streak_days, 20)
-            
-            created_count += 1
-        
-        return created_count
+                                plan.target_exercises = next_exercises
     
     def get_activity_calendar(user, days=60):
         """Generate activity calendar data for the last N days."""
@@ -450,6 +191,8 @@ def create_app(config_class=Config):
             )
             user.set_password(form.password.data)
             db.session.add(user)
+            db.session.flush()  # Get user.id
+            get_entry(user.id)
             db.session.commit()
             
             flash(f'Account created for {form.username.data}! You can now log in.', 'success')
@@ -508,136 +251,110 @@ def create_app(config_class=Config):
             .filter(WeeklyPlan.user_id == current_user.id).all()
         user_book_ids = [book_id[0] for book_id in user_book_ids]
         
-        # Update weekly plans if any chapters are completed
-        for book_id in user_book_ids:
-            update_weekly_plans_on_completion(current_user.id, book_id)
+        # Update weekly plans if any chapters are completed, for all books at once
+        update_weekly_plans_on_completion(current_user.id)
         db.session.commit()
         
-        books = Book.query.filter(Book.id.in_(user_book_ids)).all() if user_book_ids else []
-        book_data = []
-        for book in books:
-            progress = current_user.get_book_progress(book.id)
-            book_data.append({
-                'book': book,
-                'progress': progress,
-                'total_exercises': book.get_total_exercises()
-            })
-        
-        # Get ALL active weekly plans (not just one)
-        active_plans = WeeklyPlan.query.filter_by(
-            user_id=current_user.id,
-            completed=False
-        ).filter(WeeklyPlan.end_date >= date.today()).order_by(WeeklyPlan.start_date).all()
-        
-        # Get badges
-        badges = get_user_badges(current_user)
-        
-        # Get activity calendar
-        activity_calendar = get_activity_calendar(current_user)
-        
-        # Get recent submissions
-        recent_submissions = Submission.query.filter_by(user_id=current_user.id)\
-            .order_by(Submission.created_at.desc()).limit(5).all()
-        
-        # Calculate statistics
-        total_exercises = current_user.get_total_exercises_completed()
-        
-        # This week stats
-        week_start = date.today() - timedelta(days=date.today().weekday())
-        week_submissions = Submission.query.filter(
-            Submission.user_id == current_user.id,
-            Submission.created_at >= datetime.combine(week_start, datetime.min.time())
-        ).count()
-        
-        # This month stats
-        month_start = date.today().replace(day=1)
-        month_submissions = Submission.query.filter(
-            Submission.user_id == current_user.id,
-            Submission.created_at >= datetime.combine(month_start, datetime.min.time())
-        ).count()
-        
-        # This year stats
-        year_start = date.today().replace(month=1, day=1)
-        year_submissions = Submission.query.filter(
-            Submission.user_id == current_user.id,
-            Submission.created_at >= datetime.combine(year_start, datetime.min.time())
-        ).count()
-        
-        # Calculate weekly average (from account creation)
-        if current_user.date_joined:
-            days_since_joined = (datetime.utcnow() - current_user.date_joined).days
-            weeks_since_joined = max(1, days_since_joined / 7)
-            weekly_average = round(total_exercises / weeks_since_joined, 1)
-        else:
-            weekly_average = 0
-        
-        stats = {
-            'week': week_submissions,
-            'month': month_submissions,
-            'year': year_submissions,
-            'weekly_average': weekly_average
-        }
-        
-        # Get leaderboard data only if user wants to see it
-        leaderboard_data = None
-        if current_user.show_leaderboard:
-            # Get top 10 users for dashboard mini-leaderboard
-            users = User.query.all()
-            leaderboard_list = []
-            for user in users:
-                leaderboard_list.append({
-                    'user': user,
-                    'display_name': user.get_display_name(),
-                    'total_exercises': user.get_total_exercises_completed()
+        # The rest only reads (statistics), so it can use a replica
+        with replica_reads():
+            catalog = get_catalog()
+            books = [catalog.books[book_id] for book_id in user_book_ids if book_id in catalog.books]
+            book_data = []
+            for book in books:
+                progress = book_progress(current_user.id, book.id)
+                book_data.append({
+                    'book': book,
+                    'progress': progress,
+                    'total_exercises': book.total_exercises
                 })
-            leaderboard_list.sort(key=lambda x: x['total_exercises'], reverse=True)
-            leaderboard_data = leaderboard_list[:10]  # Top 10 only for dashboard
-        
-        return render_template('dashboard.html',
-                             books=book_data,
-                             active_plans=active_plans,
-                             badges=badges,
-                             activity_calendar=activity_calendar,
-                             recent_submissions=recent_submissions,
-                             stats=stats,
-                             leaderboard=leaderboard_data)
+            
+            # Get ALL active weekly plans (not just one)
+            active_plans = WeeklyPlan.query.filter_by(
+                user_id=current_user.id,
+                completed=False
+            ).options(joinedload(WeeklyPlan.book), joinedload(WeeklyPlan.chapter))\
+                .filter(WeeklyPlan.end_date >= date.today()).order_by(WeeklyPlan.start_date).all()
+            plan_progress = PlanProgressService(active_plans).compute()
+            
+            # Get badges
+            badges = get_user_badges(current_user.id)
+            
+            # Get activity calendar
+            activity_calendar = get_activity_calendar(current_user)
+            
+            # Get recent submissions
+            recent_submissions = Submission.query.filter_by(user_id=current_user.id)\
+                .order_by(Submission.created_at.desc()).limit(5).all()
+            
+            # Calculate statistics
+            total_exercises = current_user.get_total_exercises_completed()
+            
+            # This week/month/year stats from the daily rollups
+            period_stats = get_period_stats(current_user.id)
+            
+            # Calculate weekly average (from account creation)
+            if current_user.date_joined:
+                days_since_joined = (datetime.utcnow() - current_user.date_joined).days
+                weeks_since_joined = max(1, days_since_joined / 7)
+                weekly_average = round(total_exercises / weeks_since_joined, 1)
+            else:
+                weekly_average = 0
+            
+            stats = {
+                'week': period_stats['week'],
+                'month': period_stats['month'],
+                'year': period_stats['year'],
+                'weekly_average': weekly_average
+            }
+            
+            # Get leaderboard data only if user wants to see it
+            leaderboard_data = None
+            if current_user.show_leaderboard:
+                # Get top 10 users for dashboard mini-leaderboard (same LIMIT path as the leaderboard)
+                leaderboard_data = get_leaderboard('total_exercises', limit=10)
+            
+            return render_template('dashboard.html',
+                                 books=book_data,
+                                 active_plans=active_plans,
+                                 plan_progress=plan_progress,
+                                 badges=badges,
+                                 activity_calendar=activity_calendar,
+                                 recent_submissions=recent_submissions,
+                                 stats=stats,
+                                 leaderboard=leaderboard_data)
     
     @app.route('/books/<slug>')
     @login_required
     def book_detail(slug):
         """Book detail page with chapters and exercises."""
-        book = Book.query.filter_by(slug=slug).first_or_404()
-        chapters = book.chapters.all()
-        
-        # Get user's submissions for this book
-        submission_dict = {}
-        submissions = Submission.query.join(Exercise).join(Chapter)\
-            .filter(Submission.user_id == current_user.id, Chapter.book_id == book.id).all()
-        
-        for sub in submissions:
-            submission_dict[sub.exercise_id] = sub
+        book = get_book_or_404(slug)
+        
+        # Completed exercises come from the user's cached completion bitset;
+        # only the file names of completed exercises are read from submissions
+        completed_ids = completed_exercise_ids(current_user.id, book.id)
+        submission_files = {}
+        if completed_ids:
+            submission_files = dict(db.session.query(Submission.exercise_id, Submission.filename)
+                                    .join(Exercise, Submission.exercise_id == Exercise.id)
+                                    .filter(Submission.user_id == current_user.id,
+                                            Exercise.chapter_id.in_(book.chapter_ids)))
         
         # Get user's completed reading sections for this book
         from models import ReadingSection
-        reading_sections_completed = {}
-        reading_completions = ReadingSection.query.join(Chapter)\
-            .filter(ReadingSection.user_id == current_user.id, Chapter.book_id == book.id).all()
+        reading_completed = set(db.session.query(ReadingSection.chapter_id, ReadingSection.section)
+                                .filter(ReadingSection.user_id == current_user.id,
+                                        ReadingSection.chapter_id.in_(book.chapter_ids)))
         
-        for reading in reading_completions:
-            key = f"{reading.chapter_id}_{reading.section}"
-            reading_sections_completed[key] = reading
-        
-        return render_template('book_detail.html',
-                             book=book,
-                             chapters=chapters,
-                             submission_dict=submission_dict,
-                             reading_sections_completed=reading_sections_completed)
+        # Chapters -> sections -> exercises, with counts, points and bonuses precomputed
+        chapters = build_book_tree(book.id, completed_ids, submission_files, reading_completed)
+        
+        return render_template('book_detail.html', book=book, chapters=chapters)
     
     @app.route('/books/<slug>/submit', methods=['POST'])
     @login_required
     def submit_solution(slug):
         """Handle solution file upload."""
-        book = Book.query.filter_by(slug=slug).first_or_404()
+        book = get_book_or_404(slug)
         
         # Get selected exercises
         exercise_ids = request.form.getlist('exercises')
@@ -668,142 +385,52 @@ def create_app(config_class=Config):
         
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], new_filename)
         file.save(filepath)
+        UPLOAD_SIZE.observe(os.path.getsize(filepath))
         
         # Create submissions for each selected exercise
-        submission_count = 0
-        total_points_earned = 0
+        current_user.lock_for_update()
         today = date.today()
-        
-        # First, collect valid exercises and check which are new
-        exercises_to_submit = []
-        for ex_id in exercise_ids:
-            exercise = Exercise.query.get(int(ex_id))
-            if exercise:
-                # Check if already submitted
-                existing = Submission.query.filter_by(
-                    user_id=current_user.id,
-                    exercise_id=exercise.id
-                ).first()
-                
-                if not existing:
-                    exercises_to_submit.append(exercise)
-        
-        # Group exercises by section and chapter to detect completions
-        sections_completing = set()  # Set of (chapter_id, section) tuples
-        chapters_completing = set()  # Set of chapter_ids
-        
-        for exercise in exercises_to_submit:
-            # Check section completion
-            if exercise.section:
-                section_key = (exercise.chapter_id, exercise.section)
-                section_exercises = Exercise.query.filter_by(
-                    chapter_id=exercise.chapter_id,
-                    section=exercise.section
-                ).all()
-                
-                # Count already completed in this section
-                completed_in_section = Submission.query.join(Exercise).filter(
-                    Submission.user_id == current_user.id,
-                    Exercise.chapter_id == exercise.chapter_id,
-                    Exercise.section == exercise.section
-                ).count()
-                
-                # Count how many from this batch are in this section
-                batch_in_section = sum(1 for e in exercises_to_submit 
-                                      if e.chapter_id == exercise.chapter_id and e.section == exercise.section)
-                
-                # Will complete after this batch?
-                if completed_in_section + batch_in_section == len(section_exercises):
-                    sections_completing.add(section_key)
-            
-            # Check chapter completion
-            chapter_exercises = Exercise.query.filter_by(
-                chapter_id=exercise.chapter_id
-            ).all()
-            
-            completed_in_chapter = Submission.query.join(Exercise).filter(
-                Submission.user_id == current_user.id,
-                Exercise.chapter_id == exercise.chapter_id
-            ).count()
-            
-            # Count how many from this batch are in this chapter
-            batch_in_chapter = sum(1 for e in exercises_to_submit if e.chapter_id == exercise.chapter_id)
-            
-            # Will complete after this batch?
-            if completed_in_chapter + batch_in_chapter == len(chapter_exercises):
-                chapters_completing.add(exercise.chapter_id)
-        
-        # Now process each exercise with correct completion flags
-        for exercise in exercises_to_submit:
-            # Check if this is last exercise in section (by number)
-            is_last_in_section = False
-            if exercise.section:
-                section_exercises = Exercise.query.filter_by(
-                    chapter_id=exercise.chapter_id,
-                    section=exercise.section
-                ).order_by(Exercise.number.desc()).first()
-                is_last_in_section = (section_exercises and section_exercises.id == exercise.id)
-            
-            # Check if section will be complete with this batch
-            is_section_complete = False
-            if exercise.section:
-                section_key = (exercise.chapter_id, exercise.section)
-                is_section_complete = section_key in sections_completing
-            
-            # Check if chapter will be complete with this batch
-            is_chapter_complete = exercise.chapter_id in chapters_completing
-            
-            # Calculate points
-            points = exercise.calculate_points(
-                is_last_in_section=is_last_in_section,
-                is_section_complete=is_section_complete,
-                is_chapter_complete=is_chapter_complete
-            )
-            
-            submission = Submission(
-                user_id=current_user.id,
-                exercise_id=exercise.id,
-                filename=new_filename,
-                points_earned=points
-            )
-            db.session.add(submission)
-            submission_count += 1
-            total_points_earned += points
-        
-        # Update user's total points
-        if not current_user.total_points:
-            current_user.total_points = 0
-        current_user.total_points += total_points_earned
-        
-        # Update activity log for today
-        activity = ActivityLog.query.filter_by(
-            user_id=current_user.id,
-            date=today
-        ).first()
-        
-        if activity:
-            activity.exercises_done += submission_count
-        else:
-            activity = ActivityLog(
-                user_id=current_user.id,
-                date=today,
-                exercises_done=submission_count
-            )
-            db.session.add(activity)
+        submitted_at = datetime.utcnow()
+        
+        # Score the batch (new exercises only, with completion bonuses) and bulk-insert it
+        scored = score_batch(current_user.id, exercise_ids)
+        scored = insert_submissions(current_user.id, scored, new_filename, submitted_at)
+        add_completions(current_user.id, [exercise for exercise, _ in scored])
+        
+        exercises_to_submit = [exercise for exercise, _ in scored]
+        submission_count = len(scored)
+        total_points_earned = sum(points for _, points in scored)
+        rollup_items = [(submitted_at, exercise, points) for exercise, points in scored]
+        
+        # Append the points to the ledger and add them to the user's total
+        record_points(current_user, submission_events(scored), submitted_at)
+        record_submissions(current_user.id, [submitted_at] * submission_count, total_points_earned)
+        record_activity(current_user.id, rollup_items)
+        
+        # Update activity log for today (a single upsert)
+        insert_or_increment(
+            ActivityLog,
+            [{'user_id': current_user.id, 'date': today, 'exercises_done': submission_count}],
+            keys=('user_id', 'date'),
+            counters=('exercises_done',)
+        )
         
         # Update streak
         current_user.update_streak(today)
         
+        # Award any badges this submission earned
+        award_badges(current_user, exercises_to_submit)
+        
         # Check and update weekly plans if chapter is completed
         update_weekly_plans_on_completion(current_user.id, book.id)
         
-        # Simulate fake user progress (gamification)
-        simulate_fake_user_progress(current_user.id, submission_count, total_points_earned)
-        
-        # Create new random fake users (1-5)
-        new_users_count = create_random_fake_users()
-        
         db.session.commit()
+        SUBMITTED_EXERCISES.labels('upload').inc(submission_count)
+        
+        # Let the background worker simulate fake user progress (gamification), if anything new was submitted
+        if submission_count > 0:
+            enqueue('real_submission', user_id=current_user.id,
+                    exercises=submission_count, points=total_points_earned)
         
         # Store companion message in session if user has a companion (for bottom-right display)
         if current_user.companion_id:
@@ -821,9 +448,6 @@ def create_app(config_class=Config):
         else:
             flash(f'Successfully submitted solution for {submission_count} exercise(s)!', 'success')
         
-        if new_users_count > 0:
-            flash(f'🆕 {new_users_count} new competitor(s) joined the platform!', 'info')
-        
         return redirect(url_for('book_detail', slug=slug))
     
     @app.route('/books/<slug>/mark-reading/<int:chapter_id>/<int:section>', methods=['POST'])
@@ -832,8 +456,10 @@ def create_app(config_class=Config):
         """Mark a reading-only section as complete and award points."""
         from models import ReadingSection
         
-        book = Book.query.filter_by(slug=slug).first_or_404()
-        chapter = Chapter.query.get_or_404(chapter_id)
+        book = get_book_or_404(slug)
+        chapter = get_catalog().chapters.get(chapter_id)
+        if chapter is None:
+            abort(404)
         
         # Verify chapter belongs to book
         if chapter.book_id != book.id:
@@ -841,6 +467,7 @@ def create_app(config_class=Config):
             return redirect(url_for('book_detail', slug=slug))
         
         # Check if already marked as complete
+        current_user.lock_for_update()
         existing = ReadingSection.query.filter_by(
             user_id=current_user.id,
             chapter_id=chapter_id,
@@ -848,31 +475,30 @@ def create_app(config_class=Config):
         ).first()
         
         if existing:
-            # Already completed - unmark it
-            current_user.total_points -= existing.points_earned
-            db.session.delete(existing)
+            # Already completed - unmark it (unless a concurrent request just did)
+            lost_points = existing.points_earned
+            if ReadingSection.query.filter_by(id=existing.id).delete(synchronize_session=False):
+                record_points(current_user, [{'kind': REVERSAL, 'points': -lost_points, 'chapter_id': chapter_id,
+                                              'section': section, 'book_id': book.id}])
+                sync_points(current_user)
             db.session.commit()
-            flash(f'Reading section unmarked. You lost {existing.points_earned} points.', 'info')
+            flash(f'Reading section unmarked. You lost {lost_points} points.', 'info')
         else:
-            # Mark as complete and award points with chapter multiplier
-            # Base points for reading sections: 25
-            # Chapter multiplier: 5% increase per chapter
-            import math
-            base_reading_points = 25
-            chapter_number = chapter.number
-            chapter_multiplier = 1 + (0.05 * (chapter_number - 1))
-            reading_points = math.ceil(base_reading_points * chapter_multiplier)
-            
-            reading_completion = ReadingSection(
-                user_id=current_user.id,
-                chapter_id=chapter_id,
-                section=section,
-                points_earned=reading_points
-            )
-            
-            current_user.total_points = (current_user.total_points or 0) + reading_points
-            
-            db.session.add(reading_completion)
+            # Mark as complete and award the chapter's reading points (see scoring.py)
+            reading_points = chapter.points.reading
+            
+            # Points are only awarded if this request's row went in
+            inserted = insert_ignore(ReadingSection, [{
+                'user_id': current_user.id,
+                'chapter_id': chapter_id,
+                'section': section,
+                'points_earned': reading_points
+            }], keys=('user_id', 'chapter_id', 'section'), returning=('id',))
+            
+            if inserted:
+                record_points(current_user, [{'kind': READING, 'points': reading_points, 'chapter_id': chapter_id,
+                                              'section': section, 'book_id': book.id}])
+                sync_points(current_user)
             db.session.commit()
             
             flash(f'Reading section completed! You earned {reading_points} points!', 'success')
@@ -883,7 +509,7 @@ def create_app(config_class=Config):
     @login_required
     def mark_exercises_done(slug):
         """Mark exercises as done without uploading a file."""
-        book = Book.query.filter_by(slug=slug).first_or_404()
+        book = get_book_or_404(slug)
         
         # Get selected exercise IDs
         exercise_ids = request.form.getlist('exercises')
@@ -892,137 +518,50 @@ def create_app(config_class=Config):
             flash('No exercises selected.', 'warning')
             return redirect(url_for('book_detail', slug=slug))
         
-        # Create submissions without file
-        submission_count = 0
-        total_points_earned = 0
+        # Create submissions without file (filename uses a special marker)
+        current_user.lock_for_update()
         today = date.today()
-        
-        # First, collect valid exercises and check which are new
-        exercises_to_submit = []
-        for ex_id in exercise_ids:
-            exercise = Exercise.query.get(int(ex_id))
-            if exercise:
-                # Check if already submitted
-                existing = Submission.query.filter_by(
-                    user_id=current_user.id,
-                    exercise_id=exercise.id
-                ).first()
-                
-                if not existing:
-                    exercises_to_submit.append(exercise)
-        
-        # Group exercises by section and chapter to detect completions
-        sections_completing = set()
-        chapters_completing = set()
-        
-        for exercise in exercises_to_submit:
-            # Check section completion
-            if exercise.section:
-                section_key = (exercise.chapter_id, exercise.section)
-                section_exercises = Exercise.query.filter_by(
-                    chapter_id=exercise.chapter_id,
-                    section=exercise.section
-                ).all()
-                
-                completed_in_section = Submission.query.join(Exercise).filter(
-                    Submission.user_id == current_user.id,
-                    Exercise.chapter_id == exercise.chapter_id,
-                    Exercise.section == exercise.section
-                ).count()
-                
-                batch_in_section = sum(1 for e in exercises_to_submit 
-                                      if e.chapter_id == exercise.chapter_id and e.section == exercise.section)
-                
-                if completed_in_section + batch_in_section == len(section_exercises):
-                    sections_completing.add(section_key)
-            
-            # Check chapter completion
-            chapter_exercises = Exercise.query.filter_by(
-                chapter_id=exercise.chapter_id
-            ).all()
-            
-            completed_in_chapter = Submission.query.join(Exercise).filter(
-                Submission.user_id == current_user.id,
-                Exercise.chapter_id == exercise.chapter_id
-            ).count()
-            
-            batch_in_chapter = sum(1 for e in exercises_to_submit if e.chapter_id == exercise.chapter_id)
-            
-            if completed_in_chapter + batch_in_chapter == len(chapter_exercises):
-                chapters_completing.add(exercise.chapter_id)
-        
-        # Process each exercise
-        for exercise in exercises_to_submit:
-            # Check if this is last exercise in section (by number)
-            is_last_in_section = False
-            if exercise.section:
-                section_exercises = Exercise.query.filter_by(
-                    chapter_id=exercise.chapter_id,
-                    section=exercise.section
-                ).order_by(Exercise.number.desc()).first()
-                is_last_in_section = (section_exercises and section_exercises.id == exercise.id)
-            
-            # Check if section will be complete with this batch
-            is_section_complete = False
-            if exercise.section:
-                section_key = (exercise.chapter_id, exercise.section)
-                is_section_complete = section_key in sections_completing
-            
-            # Check if chapter will be complete with this batch
-            is_chapter_complete = exercise.chapter_id in chapters_completing
-            
-            # Calculate points
-            points = exercise.calculate_points(
-                is_last_in_section=is_last_in_section,
-                is_section_complete=is_section_complete,
-                is_chapter_complete=is_chapter_complete
-            )
-            
-            # Create submission without filename (use special marker)
-            submission = Submission(
-                user_id=current_user.id,
-                exercise_id=exercise.id,
-                filename='__marked_done__',  # Special marker for exercises marked as done
-                points_earned=points
-            )
-            db.session.add(submission)
-            submission_count += 1
-            total_points_earned += points
-        
-        # Update user's total points
-        if not current_user.total_points:
-            current_user.total_points = 0
-        current_user.total_points += total_points_earned
-        
-        # Update activity log for today
-        activity = ActivityLog.query.filter_by(
-            user_id=current_user.id,
-            date=today
-        ).first()
-        
-        if activity:
-            activity.exercises_done += submission_count
-        else:
-            activity = ActivityLog(
-                user_id=current_user.id,
-                date=today,
-                exercises_done=submission_count
-            )
-            db.session.add(activity)
+        submitted_at = datetime.utcnow()
+        
+        # Score the batch (new exercises only, with completion bonuses) and bulk-insert it
+        scored = score_batch(current_user.id, exercise_ids)
+        scored = insert_submissions(current_user.id, scored, '__marked_done__', submitted_at)
+        add_completions(current_user.id, [exercise for exercise, _ in scored])
+        
+        exercises_to_submit = [exercise for exercise, _ in scored]
+        submission_count = len(scored)
+        total_points_earned = sum(points for _, points in scored)
+        rollup_items = [(submitted_at, exercise, points) for exercise, points in scored]
+        
+        # Append the points to the ledger and add them to the user's total
+        record_points(current_user, submission_events(scored), submitted_at)
+        record_submissions(current_user.id, [submitted_at] * submission_count, total_points_earned)
+        record_activity(current_user.id, rollup_items)
+        
+        # Update activity log for today (a single upsert)
+        insert_or_increment(
+            ActivityLog,
+            [{'user_id': current_user.id, 'date': today, 'exercises_done': submission_count}],
+            keys=('user_id', 'date'),
+            counters=('exercises_done',)
+        )
         
         # Update streak
         current_user.update_streak(today)
         
+        # Award any badges this submission earned
+        award_badges(current_user, exercises_to_submit)
+        
         # Check and update weekly plans
         update_weekly_plans_on_completion(current_user.id, book.id)
         
-        # Simulate fake user progress
-        simulate_fake_user_progress(current_user.id, submission_count, total_points_earned)
-        
-        # Create new random fake users
-        new_users_count = create_random_fake_users()
-        
         db.session.commit()
+        SUBMITTED_EXERCISES.labels('mark_done').inc(submission_count)
+        
+        # Let the background worker simulate fake user progress, if anything new was submitted
+        if submission_count > 0:
+            enqueue('real_submission', user_id=current_user.id,
+                    exercises=submission_count, points=total_points_earned)
         
         # Store companion message in session if user has a companion
         if current_user.companion_id:
@@ -1039,18 +578,13 @@ def create_app(config_class=Config):
         else:
             flash(f'Successfully marked {submission_count} exercise(s) as done!', 'success')
         
-        if new_users_count > 0:
-            flash(f'🆕 {new_users_count} new competitor(s) joined the platform!', 'info')
-        
         return redirect(url_for('book_detail', slug=slug))
     
     @app.route('/leaderboard')
     @login_required
+    @reads_from_replica
     def leaderboard():
-
         """Global leaderboard."""
-        from datetime import datetime, timedelta
-        
         # Get sort parameter (default: total_exercises)
         sort_by = request.args.get('sort', 'total_exercises')
         # Get category filter parameter
@@ -1058,95 +592,28 @@ def create_app(config_class=Config):
         # Get team filter parameter
         team_filter = request.args.get('team', 'all')
         
-        # Get all users (with team filter if specified)
-        if team_filter != 'all':
-            users = User.query.filter_by(team=team_filter).all()
-        else:
-            users = User.query.all()
-        
-        # Calculate week/month/year start dates
-        today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())  # Monday of current week
-        month_start = today.replace(day=1)
-        year_start = today.replace(month=1, day=1)
-        
-        leaderboard_data = []
-        for user in users:
-            # Build base query for submissions
-            if category_filter != 'all':
-                # Filter submissions by book category
-                week_query = db.session.query(Submission).join(Exercise).join(Chapter).join(Book)\
-                    .filter(Submission.user_id == user.id, Submission.created_at >= week_start, Book.category == category_filter)
-                month_query = db.session.query(Submission).join(Exercise).join(Chapter).join(Book)\
-                    .filter(Submission.user_id == user.id, Submission.created_at >= month_start, Book.category == category_filter)
-                year_query = db.session.query(Submission).join(Exercise).join(Chapter).join(Book)\
-                    .filter(Submission.user_id == user.id, Submission.created_at >= year_start, Book.category == category_filter)
-                total_query = db.session.query(Submission).join(Exercise).join(Chapter).join(Book)\
-                    .filter(Submission.user_id == user.id, Book.category == category_filter)
-                
-                week_submissions = week_query.count()
-                month_submissions = month_query.count()
-                year_submissions = year_query.count()
-                total_exercises = total_query.count()
-            else:
-                # Get all submissions (no category filter)
-                week_submissions = Submission.query.filter(
-                    Submission.user_id == user.id,
-                    Submission.created_at >= week_start
-                ).count()
-                
-                month_submissions = Submission.query.filter(
-                    Submission.user_id == user.id,
-                    Submission.created_at >= month_start
-                ).count()
-                
-                year_submissions = Submission.query.filter(
-                    Submission.user_id == user.id,
-                    Submission.created_at >= year_start
-                ).count()
-                
-                total_exercises = user.get_total_exercises_completed()
-            
-            leaderboard_data.append({
-                'user': user,
-                'display_name': user.get_display_name(),
-                'total_exercises': total_exercises,
-                'total_points': user.total_points or 0,
-                'streak': user.streak_days,
-                'longest_streak': user.longest_streak,
-                'week_exercises': week_submissions,
-                'month_exercises': month_submissions,
-                'year_exercises': year_submissions
-            })
+        # Keyset cursor: (score, user_id) of the last row on the previous page
+        after = parse_cursor(request.args.get('after'))
         
-        # Sort based on selected criteria
-        if sort_by == 'total_exercises':
-            leaderboard_data.sort(key=lambda x: x['total_exercises'], reverse=True)
-        elif sort_by == 'total_points':
-            leaderboard_data.sort(key=lambda x: x['total_points'], reverse=True)
-        elif sort_by == 'streak':
-            leaderboard_data.sort(key=lambda x: x['streak'], reverse=True)
-        elif sort_by == 'longest_streak':
-            leaderboard_data.sort(key=lambda x: x['longest_streak'], reverse=True)
-        elif sort_by == 'week_exercises':
-            leaderboard_data.sort(key=lambda x: x['week_exercises'], reverse=True)
-        elif sort_by == 'month_exercises':
-            leaderboard_data.sort(key=lambda x: x['month_exercises'], reverse=True)
-        elif sort_by == 'year_exercises':
-            leaderboard_data.sort(key=lambda x: x['year_exercises'], reverse=True)
-        else:
-            # Default: sort by total exercises
-            leaderboard_data.sort(key=lambda x: x['total_exercises'], reverse=True)
+        # Sorting and ranking happen in the database, one page at a time
+        leaderboard_data, next_cursor = get_leaderboard_page(sort_by, team_filter, category_filter,
+                                                             limit=app.config['LEADERBOARD_PAGE_SIZE'],
+                                                             after=after)
         
-        # Add rank
-        for idx, entry in enumerate(leaderboard_data, 1):
-            entry['rank'] = idx
+        # Current user's rank from a single counting query
+        my_rank, my_score = get_user_rank(current_user.id, sort_by, team_filter, category_filter)
+        # Cursor just before the current user, so their row starts the page
+        my_cursor = format_cursor(my_score, current_user.id - 1) if my_rank else None
         
         return render_template('leaderboard.html', 
                              leaderboard=leaderboard_data, 
                              sort_by=sort_by,
                              category_filter=category_filter,
-                             team_filter=team_filter)
+                             team_filter=team_filter,
+                             is_first_page=(after is None),
+                             next_cursor=next_cursor,
+                             my_rank=my_rank,
+                             my_cursor=my_cursor)
     
     @app.route('/weekly-plan', methods=['GET', 'POST'])
     @login_required
@@ -1155,11 +622,12 @@ def create_app(config_class=Config):
         form = WeeklyPlanForm()
         
         # Populate book choices - keep it simple for the form
-        books = Book.query.order_by(Book.title).all()
+        catalog = get_catalog()
+        books = catalog.books_by_title()
         form.book_id.choices = [(0, 'Select a book')] + [(book.id, book.title) for book in books]
         
         # Populate chapter choices (will be all chapters for now)
-        all_chapters = Chapter.query.all()
+        all_chapters = catalog.all_chapters()
         form.start_chapter.choices = [(0, 'Select starting chapter')] + \
             [(ch.id, f"{ch.book.title} - Ch {ch.number}: {ch.title}") for ch in all_chapters]
         
@@ -1175,7 +643,7 @@ def create_app(config_class=Config):
             start_date = date.today()
             end_date = start_date + timedelta(days=7)
             
-            target_exercise_ids = []
+            target_exercises = []
             custom_text = None
             chapter_id = None
             current_chapter_number = None
@@ -1188,8 +656,7 @@ def create_app(config_class=Config):
                     if chapter:
                         chapter_id = chapter.id
                         current_chapter_number = chapter.number
-                        exercises = Exercise.query.filter_by(chapter_id=chapter.id).all()
-                        target_exercise_ids = [ex.id for ex in exercises]
+                        target_exercises = Exercise.query.filter_by(chapter_id=chapter.id).all()
                 else:
                     flash('Please select a starting chapter for chapterwise mode.', 'warning')
                     return redirect(url_for('weekly_plan'))
@@ -1202,8 +669,7 @@ def create_app(config_class=Config):
                     if chapter:
                         chapter_id = chapter.id
                         current_chapter_number = chapter.number
-                        exercises = Exercise.query.filter_by(chapter_id=chapter.id).all()
-                        target_exercise_ids = [ex.id for ex in exercises]
+                        target_exercises = Exercise.query.filter_by(chapter_id=chapter.id).all()
                 else:
                     flash('Please select a starting chapter for subchapterwise mode.', 'warning')
                     return redirect(url_for('weekly_plan'))
@@ -1217,7 +683,7 @@ def create_app(config_class=Config):
                 
                 # For own_pace, we don't auto-populate exercises
                 # User will manually mark them as done
-                target_exercise_ids = []
+                target_exercises = []
             
             # Create weekly plan
             plan = WeeklyPlan(
@@ -1229,7 +695,7 @@ def create_app(config_class=Config):
                 deadline_time=deadline_time,
                 start_date=start_date,
                 end_date=end_date,
-                target_exercises=json.dumps(target_exercise_ids) if target_exercise_ids else None,
+                target_exercises=target_exercises,
                 custom_text=custom_text
             )
             db.session.add(plan)
@@ -1240,12 +706,12 @@ def create_app(config_class=Config):
         
         # Get user's plans
         plans = WeeklyPlan.query.filter_by(user_id=current_user.id)\
+            .options(joinedload(WeeklyPlan.book), joinedload(WeeklyPlan.chapter))\
             .order_by(WeeklyPlan.start_date.desc()).all()
+        plan_progress = PlanProgressService(plans).compute()
         
-        # Get all chapters for filtering in template
-        all_chapters = Chapter.query.order_by(Chapter.book_id, Chapter.number).all()
-        
-        return render_template('weekly_plan.html', form=form, plans=plans, books=books, all_chapters=all_chapters)
+        return render_template('weekly_plan.html', form=form, plans=plans, plan_progress=plan_progress,
+                               books=books, all_chapters=all_chapters)
     
     @app.route('/weekly-plan/delete/<int:plan_id>', methods=['POST'])
     @login_required
@@ -1259,6 +725,7 @@ def create_app(config_class=Config):
             return redirect(url_for('weekly_plan'))
         
         book_id = plan.book_id
+        current_user.lock_for_update()
         
         # Delete all submissions for exercises in this book
         submissions_to_delete = Submission.query.join(Exercise).join(Chapter)\
@@ -1284,8 +751,13 @@ def create_app(config_class=Config):
             db.session.delete(reading)
         
         # Deduct points from user's total
-        if current_user.total_points:
-            current_user.total_points = max(0, current_user.total_points - points_to_deduct)
+        record_points(current_user, [{'kind': PLAN_RESET, 'points': -points_to_deduct, 'book_id': book_id}])
+        
+        # Remove the deleted submissions from the leaderboard and daily rollups
+        remove_submissions(current_user.id, [sub.created_at for sub in submissions_to_delete], 0)
+        sync_points(current_user)
+        remove_book_activity(current_user.id, book_id)
+        clear_completions(current_user.id, book_id)
         
         # Delete the weekly plan
         db.session.delete(plan)
@@ -1302,11 +774,13 @@ def create_app(config_class=Config):
     
     @app.route('/my-uploads')
     @login_required
+    @reads_from_replica
     def my_uploads():
         """View all user uploads."""
         # Get all submissions with related data
         submissions = Submission.query.filter_by(user_id=current_user.id)\
             .join(Exercise).join(Chapter).join(Book)\
+            .options(contains_eager(Submission.exercise).contains_eager(Exercise.chapter).contains_eager(Chapter.book))\
             .order_by(Submission.created_at.desc()).all()
         
         # Group by file (since one file can be for multiple exercises)
@@ -1327,6 +801,7 @@ def create_app(config_class=Config):
     
     @app.route('/profile/<username>')
     @login_required
+    @reads_from_replica
     def user_profile(username):
         """View user profile page."""
         from datetime import datetime, timedelta
@@ -1352,26 +827,8 @@ def create_app(config_class=Config):
         }
         
         if stats_visible:
-            # Calculate statistics
-            today = datetime.now().date()
-            week_start = today - timedelta(days=today.weekday())
-            month_start = today.replace(day=1)
-            year_start = today.replace(month=1, day=1)
-            
-            week_submissions = Submission.query.filter(
-                Submission.user_id == user.id,
-                Submission.created_at >= week_start
-            ).count()
-            
-            month_submissions = Submission.query.filter(
-                Submission.user_id == user.id,
-                Submission.created_at >= month_start
-            ).count()
-            
-            year_submissions = Submission.query.filter(
-                Submission.user_id == user.id,
-                Submission.created_at >= year_start
-            ).count()
+            # Calculate statistics from the daily rollups
+            period_stats = get_period_stats(user.id)
             
             # Calculate weekly average
             weeks_active = max(1, (datetime.now().date() - user.date_joined.date()).days // 7)
@@ -1382,9 +839,9 @@ def create_app(config_class=Config):
                 'total_exercises': total_exercises,
                 'streak_days': user.streak_days,
                 'longest_streak': user.longest_streak,
-                'week': week_submissions,
-                'month': month_submissions,
-                'year': year_submissions,
+                'week': period_stats['week'],
+                'month': period_stats['month'],
+                'year': period_stats['year'],
                 'weekly_average': weekly_average
             }
         
@@ -1393,12 +850,13 @@ def create_app(config_class=Config):
             user_data['activity_calendar'] = get_activity_calendar(user)
             
             # Get badges
-            user_data['badges'] = get_user_badges(user)
+            user_data['badges'] = get_user_badges(user.id)
         
         if uploads_visible:
             # Get user uploads
             submissions = Submission.query.filter_by(user_id=user.id)\
                 .join(Exercise).join(Chapter).join(Book)\
+                .options(contains_eager(Submission.exercise).contains_eager(Exercise.chapter).contains_eager(Chapter.book))\
                 .order_by(Submission.created_at.desc()).all()
             
             uploads = {}
@@ -0,0 +1,136 @@
+"""
+Badge rules and awards.
+
+Badges are (metric, threshold) rules in BADGES, evaluated on submission and
+stored in user_badges.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import func
+
+from models import db, User, Exercise, Submission, UserBadge
+from catalog import get_catalog
+from completions import get_completion_bits
+from dbutils import insert_ignore
+
+
+BadgeRule = namedtuple('BadgeRule', [
+    'key', 'name', 'description', 'icon', 'color',
+    'metric',       # 'exercises', 'streak' or 'chapters'
+    'threshold'     # awarded once the metric reaches this value
+])
+
+# In display order
+BADGES = (
+    BadgeRule('first_steps', 'First Steps', 'Completed your first exercise', '🎯', 'success', 'exercises', 1),
+    BadgeRule('getting_serious', 'Getting Serious', 'Completed 20+ exercises', '📚', 'primary', 'exercises', 20),
+    BadgeRule('book_grinder', 'Book Grinder', 'Completed 100+ exercises', '🔥', 'danger', 'exercises', 100),
+    BadgeRule('one_week_streak', 'One-Week Streak', '7+ day streak', '⚡', 'warning', 'streak', 7),
+    BadgeRule('chapter_finisher', 'Chapter Finisher', 'Completed a full chapter', '🏆', 'info', 'chapters', 1),
+)
+
+BADGES_BY_KEY = {rule.key: rule for rule in BADGES}
+
+# Users per statement in award_badges_bulk
+BULK_CHUNK_SIZE = 500
+
+
+def get_user_badges(user_id):
+    """Badges awarded to a user, as BadgeRule rows in display order."""
+    keys = {row[0] for row in db.session.query(UserBadge.badge_key).filter(UserBadge.user_id == user_id)}
+    return [rule for rule in BADGES if rule.key in keys]
+
+
+def _completed_chapters(user_id, exercises):
+    """How many of the chapters touched by `exercises` the user has now completed."""
+    catalog = get_catalog()
+    completed = 0
+    for chapter_id in {exercise.chapter_id for exercise in exercises}:
+        chapter = catalog.chapters[chapter_id]
+        mask = 0
+        for exercise_id in chapter.exercise_ids:
+            mask |= 1 << catalog.exercises[exercise_id].bit
+        if mask and get_completion_bits(user_id, chapter.book_id) & mask == mask:
+            completed += 1
+    return completed
+
+
+def award_badges(user, exercises=()):
+    """Award the badges a user has just earned.
+
+    Call after a submission has been written and the streak updated;
+    `exercises` are the catalog ExerciseInfo rows just completed. Only rules the
+    user hasn't got yet are checked, and each metric is looked up at most once.
+    Chapters are checked for the touched chapters only, since any earlier
+    completion was rewarded when it happened. Returns the new BadgeRules.
+    """
+    awarded = {row[0] for row in db.session.query(UserBadge.badge_key).filter(UserBadge.user_id == user.id)}
+    pending = [rule for rule in BADGES if rule.key not in awarded]
+    if not pending:
+        return []
+
+    metrics = {}
+
+    def metric(name):
+        if name not in metrics:
+            if name == 'exercises':
+                metrics[name] = user.get_total_exercises_completed()
+            elif name == 'streak':
+                metrics[name] = user.streak_days or 0
+            else:
+                metrics[name] = _completed_chapters(user.id, exercises) if exercises else 0
+        return metrics[name]
+
+    earned = [rule for rule in pending if metric(rule.metric) >= rule.threshold]
+    now = datetime.utcnow()
+    insert_ignore(UserBadge, [
+        {'user_id': user.id, 'badge_key': rule.key, 'awarded_at': now} for rule in earned
+    ], keys=('user_id', 'badge_key'))
+    return earned
+
+
+def _bulk_metrics(user_ids):
+    """{metric: {user_id: value}} for a chunk of users, from three queries."""
+    exercises = dict(
+        db.session.query(Submission.user_id, func.count(func.distinct(Submission.exercise_id)))
+        .filter(Submission.user_id.in_(user_ids))
+        .group_by(Submission.user_id).all()
+    )
+    streaks = dict(db.session.query(User.id, User.streak_days).filter(User.id.in_(user_ids)).all())
+
+    catalog = get_catalog()
+    chapters = {}
+    rows = db.session.query(Submission.user_id, Exercise.chapter_id, func.count(func.distinct(Submission.exercise_id)))\
+        .join(Exercise, Submission.exercise_id == Exercise.id)\
+        .filter(Submission.user_id.in_(user_ids))\
+        .group_by(Submission.user_id, Exercise.chapter_id)
+    for user_id, chapter_id, done in rows:
+        chapter = catalog.chapters.get(chapter_id)
+        if chapter is not None and chapter.exercise_ids and done >= len(chapter.exercise_ids):
+            chapters[user_id] = chapters.get(user_id, 0) + 1
+
+    return {'exercises': exercises, 'streak': streaks, 'chapters': chapters}
+
+
+def award_badges_bulk(user_ids):
+    """Evaluate every rule for many users at once (bots, backfills).
+
+    Badges already held are left alone. Returns the number of rows offered for
+    insertion.
+    """
+    user_ids = list(user_ids)
+    now = datetime.utcnow()
+    offered = 0
+    for offset in range(0, len(user_ids), BULK_CHUNK_SIZE):
+        chunk = user_ids[offset:offset + BULK_CHUNK_SIZE]
+        metrics = _bulk_metrics(chunk)
+        rows = [
+            {'user_id': user_id, 'badge_key': rule.key, 'awarded_at': now}
+            for user_id in chunk
+            for rule in BADGES
+            if (metrics[rule.metric].get(user_id) or 0) >= rule.threshold
+        ]
+        insert_ignore(UserBadge, rows, keys=('user_id', 'badge_key'))
+        offered += len(rows)
+    return offered
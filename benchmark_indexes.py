@@ -0,0 +1,144 @@
+"""
+Benchmark: query plans and timings of the submissions hot paths, with the old
+single-column indexes and with the composite indexes from the models.
+
+Builds a throwaway SQLite database with the seed catalog and a few thousand
+bots, then runs each query under both index sets and prints SQLite's
+EXPLAIN QUERY PLAN next to the median time.
+
+Usage:
+    python benchmark_indexes.py [--bots 3000] [--repeat 50]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import func
+
+from config import Config
+from app import create_app
+from models import db, User, Exercise, Submission
+from catalog import bump_catalog_version, get_catalog
+
+
+# Index set before the composite indexes (name, table, columns)
+OLD_INDEXES = (
+    ('ix_submissions_user_id', 'submissions', 'user_id'),
+    ('ix_submissions_exercise_id', 'submissions', 'exercise_id'),
+    ('ix_exercises_chapter_id', 'exercises', 'chapter_id'),
+)
+
+
+def benchmark_queries(user_id):
+    """The hot queries, as (label, SQLAlchemy query) pairs."""
+    catalog = get_catalog()
+    chapter = catalog.all_chapters()[0]
+    book = catalog.books[chapter.book_id]
+    exercise_ids = list(chapter.exercise_ids)
+    return [
+        ('leaderboard: per-user totals (rebuild_entries)',
+         db.session.query(Submission.user_id, func.count(func.distinct(Submission.exercise_id)))
+         .group_by(Submission.user_id)),
+        ('dashboard: exercises completed',
+         db.session.query(func.count(func.distinct(Submission.exercise_id)))
+         .filter(Submission.user_id == user_id)),
+        ('dashboard: recent submissions',
+         Submission.query.filter_by(user_id=user_id).order_by(Submission.created_at.desc()).limit(5)),
+        ('submit: completions in touched chapters (score_batch)',
+         db.session.query(Submission.exercise_id)
+         .filter(Submission.user_id == user_id, Submission.exercise_id.in_(exercise_ids))),
+        ('submit: rebuild completion bitset',
+         db.session.query(Submission.exercise_id)
+         .join(Exercise, Submission.exercise_id == Exercise.id)
+         .filter(Submission.user_id == user_id, Exercise.chapter_id.in_(book.chapter_ids))),
+        ('exercise: who completed a chapter\'s exercises',
+         db.session.query(Submission.exercise_id, func.count(Submission.user_id))
+         .filter(Submission.exercise_id.in_(exercise_ids))
+         .group_by(Submission.exercise_id)),
+        ('catalog: exercises of a section',
+         db.session.query(Exercise.id)
+         .filter(Exercise.chapter_id == chapter.id, Exercise.section == 1)
+         .order_by(Exercise.number)),
+    ]
+
+
+def use_old_indexes(conn):
+    """Swap the model's indexes for the original single-column ones."""
+    for index in list(Submission.__table__.indexes) + list(Exercise.__table__.indexes):
+        if index.name != 'ix_submissions_created_at':
+            conn.execute(db.text(f'DROP INDEX IF EXISTS {index.name}'))
+    for name, table, column in OLD_INDEXES:
+        conn.execute(db.text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})'))
+    conn.execute(db.text('ANALYZE'))
+
+
+def use_new_indexes(conn):
+    """Swap back to the indexes declared on the models."""
+    for name, _, _ in OLD_INDEXES:
+        conn.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+    for index in list(Submission.__table__.indexes) + list(Exercise.__table__.indexes):
+        index.create(conn, checkfirst=True)
+    conn.execute(db.text('ANALYZE'))
+
+
+def run(queries, repeat):
+    """{label: (plan lines, median ms)}"""
+    results = {}
+    for label, query in queries:
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = [row[-1] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql))]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.session.execute(db.text(sql)).all()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = (plan, statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare query plans before and after the composite indexes.')
+    parser.add_argument('--bots', type=int, default=3000, help='Bots to generate (default 3000)')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per query (default 50)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'benchmark.db')
+        UPLOAD_FOLDER = workdir
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        from init_db import seed_data
+        from bots import generate_bots
+
+        db.create_all()
+        seed_data()
+        bump_catalog_version()
+        print(f"Generating {args.bots} bots...")
+        generate_bots(args.bots, exercise_range=(5, 60), joined_days_range=(0, 90))
+        db.session.commit()
+        user_id = db.session.query(func.max(User.id)).scalar()
+        print(f"✓ {db.session.query(func.count(Submission.id)).scalar()} submissions\n")
+
+        queries = benchmark_queries(user_id)
+        use_old_indexes(db.session.connection())
+        db.session.commit()
+        before = run(queries, args.repeat)
+        use_new_indexes(db.session.connection())
+        db.session.commit()
+        after = run(queries, args.repeat)
+
+        for label, _ in queries:
+            old_plan, old_ms = before[label]
+            new_plan, new_ms = after[label]
+            print(label)
+            print(f"  before {old_ms:8.3f} ms  " + ' | '.join(old_plan))
+            print(f"  after  {new_ms:8.3f} ms  " + ' | '.join(new_plan))
+
+
+if __name__ == '__main__':
+    main()
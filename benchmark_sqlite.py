@@ -0,0 +1,163 @@
+"""
+Benchmark: read latency under concurrent writes, with SQLite's default
+settings and with the production profile (Config.SQLITE_PRAGMAS).
+
+Builds a throwaway database with the seed catalog, some bots and a pool of
+users, copies it, and then runs the same workload against each copy. Writer
+threads post mark-done batches and reading toggles while reader threads load
+the leaderboard, dashboard and book pages. It prints the reader latency
+percentiles and throughput, and the write and failure counts.
+
+Usage:
+    python benchmark_sqlite.py [--seconds 10] [--readers 8] [--writers 4] [--bots 500]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from config import Config
+from app import create_app
+from models import db, User
+from leaderboard import get_entry
+from catalog import bump_catalog_version, get_catalog
+
+
+PASSWORD = 'benchmark'
+
+
+def build_database(path, users, bots):
+    """Seed a database at `path` in SQLite's default (rollback journal) mode."""
+    class BuildConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        UPLOAD_FOLDER = os.path.dirname(path)
+        SQLITE_PRAGMAS = {}
+
+    app = create_app(BuildConfig)
+    with app.app_context():
+        from init_db import seed_data
+        from bots import generate_bots
+
+        db.create_all()
+        seed_data()
+        bump_catalog_version()
+        generate_bots(bots, exercise_range=(5, 60), joined_days_range=(0, 90))
+        for i in range(users):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com')
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.flush()
+            get_entry(user.id)
+        db.session.commit()
+        db.engine.dispose()
+
+
+def reader(app, username, book, stop, latencies, statuses):
+    """Load read-only pages until `stop` is set, timing each request."""
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': PASSWORD})
+    pages = ['/leaderboard', '/dashboard', f'/books/{book.slug}']
+    while not stop.is_set():
+        for page in pages:
+            start = time.perf_counter()
+            try:
+                statuses[client.get(page).status_code] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+
+def writer(app, username, book, stop, seed, statuses):
+    """Post mark-done batches and reading toggles until `stop` is set."""
+    rng = random.Random(seed)
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': PASSWORD})
+    exercise_ids = list(book.exercise_ids)
+    while not stop.is_set():
+        try:
+            if rng.random() < 0.5:
+                batch = rng.sample(exercise_ids, min(len(exercise_ids), rng.randint(1, 4)))
+                response = client.post(f'/books/{book.slug}/mark-done', data={'exercises': batch})
+            else:
+                chapter_id = rng.choice(book.chapter_ids)
+                response = client.post(f'/books/{book.slug}/mark-reading/{chapter_id}/{rng.randint(1, 3)}')
+            statuses[response.status_code] += 1
+        except Exception as e:
+            # TESTING propagates view errors, e.g. "database is locked"
+            statuses[type(e).__name__] += 1
+
+
+def run_workload(path, pragmas, args):
+    """Run readers and writers against the database at `path`; returns the measurements."""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        UPLOAD_FOLDER = os.path.dirname(path)
+        SQLITE_PRAGMAS = pragmas
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        QUERY_STATS_LOG = False  # One log line per request would drown the results
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        book = get_catalog().books_by_title()[0]
+
+    stop = threading.Event()
+    latencies = []
+    read_statuses, write_statuses = Counter(), Counter()
+    threads = [
+        threading.Thread(target=reader, args=(app, f'bench{i}', book, stop, latencies, read_statuses))
+        for i in range(args.readers)
+    ] + [
+        threading.Thread(target=writer, args=(app, f'bench{args.readers + i}', book, stop, i, write_statuses))
+        for i in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+    return latencies, read_statuses, write_statuses
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare read latency under writes with and without the SQLite profile.')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each run (default 10)')
+    parser.add_argument('--readers', type=int, default=8, help='Reader threads (default 8)')
+    parser.add_argument('--writers', type=int, default=4, help='Writer threads (default 4)')
+    parser.add_argument('--bots', type=int, default=500, help='Bots to generate (default 500)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    base = os.path.join(workdir, 'base.db')
+    print(f"Building a database with {args.bots} bots...")
+    build_database(base, args.readers + args.writers, args.bots)
+
+    profiles = [('default', {}), ('production', Config.SQLITE_PRAGMAS)]
+    for name, pragmas in profiles:
+        path = os.path.join(workdir, f'{name}.db')
+        shutil.copyfile(base, path)
+        latencies, read_statuses, write_statuses = run_workload(path, pragmas, args)
+        print(f"\n{name} ({', '.join(f'{key}={value}' for key, value in pragmas.items()) or 'SQLite defaults'})")
+        print(f"  reads   {len(latencies) / args.seconds:8.1f}/s  "
+              f"p50 {percentile(latencies, 0.5):7.2f} ms  p95 {percentile(latencies, 0.95):7.2f} ms  "
+              f"p99 {percentile(latencies, 0.99):7.2f} ms  max {max(latencies, default=0):7.2f} ms")
+        print(f"  writes  {sum(write_statuses.values()) / args.seconds:8.1f}/s")
+        print(f"  read responses  {dict(read_statuses)}")
+        print(f"  write responses {dict(write_statuses)}")
+
+
+if __name__ == '__main__':
+    main()
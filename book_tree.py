@@ -0,0 +1,88 @@
+"""
+Prepared chapter -> section -> exercise tree for the book detail page.
+
+Everything book_detail.html shows (counts, point sums, bonus values, section
+names, completion state) is worked out here from the catalog snapshot and the
+user's completions, so the template does no queries and no arithmetic. Point
+values come from the catalog's precomputed scoring (scoring.py).
+"""
+from catalog import get_catalog
+
+
+# Section titles shown for the Complex Analysis chapters; other chapters use "Section n"
+SECTION_NAMES = {
+    1: {
+        1: 'Definition',
+        2: 'Polar Form',
+        3: 'Complex Valued Functions',
+        4: 'Limits and Compact Sets',
+        5: 'Complex Differentiability',
+        6: 'The Cauchy-Riemann Equations',
+        7: 'Angles Under Holomorphic Maps'
+    },
+    2: {
+        1: 'Formal Power Series',
+        2: 'Convergent Power Series',
+        3: 'Relations Between Formal and Convergent Series',
+        4: 'Analytic Functions',
+        5: 'Differentiation of Power Series',
+        6: 'The Inverse and Open Mapping Theorems',
+        7: 'The Local Maximum Modulus Principle'
+    }
+}
+
+# The page lists sections §1-§7 of every chapter
+SECTION_NUMBERS = range(1, 8)
+
+MARKED_DONE = '__marked_done__'
+
+
+def build_book_tree(book_id, completed_ids, submission_files, reading_completed):
+    """Return the chapters of a book as a list of dicts for book_detail.html.
+
+    `completed_ids` are the user's completed exercise ids, `submission_files`
+    maps exercise id -> uploaded file name, and `reading_completed` is a set of
+    (chapter_id, section) reading sections the user has marked complete.
+    """
+    catalog = get_catalog()
+    chapters = []
+    for chapter in catalog.book_chapters(book_id):
+        names = SECTION_NAMES.get(chapter.number, {})
+        sections = []
+        for number in SECTION_NUMBERS:
+            exercises = []
+            for exercise_id in chapter.sections.get(number, ()):
+                exercise = catalog.exercises[exercise_id]
+                completed = exercise_id in completed_ids
+                filename = submission_files.get(exercise_id, MARKED_DONE) if completed else None
+                exercises.append({
+                    'id': exercise_id,
+                    'display_number': exercise.get_display_number(),
+                    'difficulty': exercise.difficulty,
+                    'points': exercise.points,
+                    'completed': completed,
+                    'filename': filename,
+                    'marked_done': filename == MARKED_DONE
+                })
+            sections.append({
+                'number': number,
+                'name': names.get(number, f'Section {number}'),
+                'exercises': exercises,
+                'exercise_count': len(exercises),
+                'total_points': chapter.section_points.get(number, 0),
+                'is_reading': len(exercises) == 1,
+                'reading_complete': (chapter.id, number) in reading_completed,
+                'reading_points': chapter.points.reading,
+                'completion_bonus': chapter.points.section_complete,
+                'last_bonus': chapter.points.last_in_section
+            })
+        chapters.append({
+            'id': chapter.id,
+            'number': chapter.number,
+            'title': chapter.title,
+            'exercise_count': len(chapter.exercise_ids),
+            'total_points': chapter.total_points,
+            'completion_bonus': chapter.points.chapter_complete,
+            'sections': sections
+        })
+    return chapters
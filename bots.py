@@ -0,0 +1,401 @@
+"""
+Fake (bot) user simulation for the gamification features.
+
+Bots progress alongside real users and new bots join over time. These run in
+the background worker (see jobs.py), never in the request path.
+"""
+import random
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, func, insert, select, update
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Submission, ActivityLog
+from leaderboard import period_starts, record_submissions_bulk
+from rollups import record_activity_bulk
+from dbutils import insert_or_increment
+from catalog import get_catalog
+from completions import invalidate_completions
+from badges import award_badges_bulk
+from ledger import record_points_bulk, SUBMISSION
+
+# Bots simulated per chunk in simulate_fake_user_progress
+SIMULATION_CHUNK_SIZE = 1000
+
+
+def catalog_exercises():
+    """Every exercise as a catalog ExerciseInfo, ordered by id."""
+    catalog = get_catalog()
+    return [catalog.exercises[exercise_id] for exercise_id in sorted(catalog.exercises)]
+
+
+def simulate_fake_user_progress(submissions, chunk_size=SIMULATION_CHUNK_SIZE):
+    """Simulate progress for fake users when real users submit exercises.
+    
+    `submissions` maps each submitting user id to their (exercises, points)
+    totals. Bots don't react to other bots; the bots react once to the
+    exercises of all the real users together.
+    
+    Bots are simulated `chunk_size` at a time (see _simulate_bot_chunk), so
+    memory stays flat however many bots there are, and each chunk's results go
+    back in bulk statements rather than one query per bot.
+    """
+    # Don't simulate for fake submitters
+    real_ids = {user_id for (user_id,) in db.session.query(User.id).filter(
+        User.id.in_(list(submissions)), User.is_fake.is_not(True))}
+    exercises_submitted = sum(submissions[user_id][0] for user_id in real_ids)
+    if not exercises_submitted:
+        return 0
+
+    # All exercises (with their book and base points) from the catalog snapshot
+    exercises = catalog_exercises()
+    if not exercises:
+        return 0
+
+    rng = np.random.default_rng()
+    submitted = 0
+    last_id = 0
+    while True:
+        # Next chunk of fake users, by id
+        bots = db.session.query(User.id, User.competitiveness, User.streak_days, User.longest_streak)\
+            .filter(User.is_fake == True, User.id > last_id).order_by(User.id).limit(chunk_size).all()
+        if not bots:
+            break
+        last_id = bots[-1].id
+        submitted += _simulate_bot_chunk(bots, exercises, exercises_submitted, rng)
+
+    if submitted:
+        invalidate_completions(select(User.id).where(User.is_fake == True))
+    return submitted
+
+
+def _simulate_bot_chunk(bots, exercises, exercises_submitted, rng):
+    """Simulate one chunk of bots; returns the number of submissions written."""
+    exercise_ids = np.array([exercise.id for exercise in exercises])
+    exercise_points = np.array([exercise.points for exercise in exercises])
+
+    # Exercises each bot of the chunk has already done
+    done = defaultdict(list)
+    for bot_id, exercise_id in db.session.query(Submission.user_id, Submission.exercise_id)\
+            .filter(Submission.user_id.in_([bot.id for bot in bots])):
+        done[bot_id].append(exercise_id)
+
+    # Determine how many exercises each fake user will complete
+    # Based on their competitiveness (10-90% of real user's progress) with ±15% variation
+    competitiveness = np.array([bot.competitiveness or 0.5 for bot in bots])
+    actual_percentage = rng.uniform(np.maximum(0.1, competitiveness - 0.15),
+                                    np.minimum(0.9, competitiveness + 0.15))
+    num_exercises = np.maximum(1, (exercises_submitted * actual_percentage).astype(int))
+
+    # Randomly select exercises among each bot's open ones (none for bots that have done everything)
+    bot_index = []
+    exercise_index = []
+    for bot_i, bot in enumerate(bots):
+        open_exercises = np.flatnonzero(~np.isin(exercise_ids, done.get(bot.id, ())))
+        count = min(int(num_exercises[bot_i]), len(open_exercises))
+        if count:
+            exercise_index.append(rng.choice(open_exercises, size=count, replace=False))
+            bot_index.append(np.full(count, bot_i))
+    if not bot_index:
+        return 0
+    bot_index = np.concatenate(bot_index)
+    exercise_index = np.concatenate(exercise_index)
+    counts = np.bincount(bot_index, minlength=len(bots))
+
+    # Slight time variation (within last 6 hours)
+    minutes_ago = rng.integers(0, 7, len(bot_index)) * 60 + rng.integers(0, 60, len(bot_index))
+    now = datetime.utcnow()
+    submission_times = [now - timedelta(minutes=int(minutes)) for minutes in minutes_ago]
+
+    # Fake users earn each exercise's base points, without bonuses
+    points = exercise_points[exercise_index]
+    submission_rows = []
+    rollup_items = []
+    ledger_rows = []
+    for bot_i, exercise_i, submission_time, exercise_points_earned in zip(
+            bot_index.tolist(), exercise_index.tolist(), submission_times, points.tolist()):
+        bot_id = bots[bot_i].id
+        exercise = exercises[exercise_i]
+        submission_rows.append({
+            'user_id': bot_id,
+            'exercise_id': exercise.id,
+            'filename': f'ai_solution_{bot_id}_{exercise.id}.pdf',
+            'created_at': submission_time,
+            'status': 'submitted',
+            'points_earned': exercise_points_earned
+        })
+        rollup_items.append((bot_id, submission_time, exercise.book_id, exercise.category,
+                             exercise_points_earned))
+        if exercise_points_earned:
+            ledger_rows.append({'user_id': bot_id, 'kind': SUBMISSION, 'points': exercise_points_earned,
+                                'exercise_id': exercise.id, 'book_id': exercise.book_id,
+                                'created_at': submission_time})
+    db.session.execute(insert(Submission.__table__), submission_rows)
+    record_points_bulk(ledger_rows)
+
+    # Per-bot totals
+    bot_points = np.bincount(bot_index, weights=points, minlength=len(bots)).astype(int)
+    week_start, month_start, year_start = period_starts()
+    submission_days = np.array([submission_time.date() for submission_time in submission_times])
+
+    def per_bot(mask):
+        return np.bincount(bot_index[mask], minlength=len(bots))
+
+    week_counts = per_bot(submission_days >= week_start)
+    month_counts = per_bot(submission_days >= month_start)
+    year_counts = per_bot(submission_days >= year_start)
+
+    # Small chance to update streak
+    streaks = np.array([bot.streak_days or 0 for bot in bots])
+    longest = np.array([bot.longest_streak or 0 for bot in bots])
+    bumped = rng.random(len(bots)) < 0.3  # 30% chance
+    streaks = np.where(bumped, np.minimum(streaks + 1, 30), streaks)
+    longest = np.maximum(longest, streaks)
+
+    active = np.nonzero(counts)[0].tolist()
+    today = date.today()
+    # Points are added by the database so a concurrent real submission can't be overwritten
+    users = User.__table__
+    db.session.execute(
+        update(users).where(users.c.id == bindparam('bot_id')).values(
+            total_points=func.coalesce(users.c.total_points, 0) + bindparam('points'),
+            streak_days=bindparam('streak'),
+            longest_streak=bindparam('longest'),
+            last_active_date=today
+        ),
+        [
+            {
+                'bot_id': bots[i].id,
+                'points': int(bot_points[i]),
+                'streak': int(streaks[i]),
+                'longest': int(longest[i])
+            }
+            for i in active
+        ]
+    )
+    record_submissions_bulk([
+        {
+            'user_id': bots[i].id,
+            'total_exercises': int(counts[i]),
+            'total_points': int(bot_points[i]),
+            'week_exercises': int(week_counts[i]),
+            'month_exercises': int(month_counts[i]),
+            'year_exercises': int(year_counts[i])
+        }
+        for i in active
+    ])
+    record_activity_bulk(rollup_items)
+
+    # Update activity log for fake users
+    insert_or_increment(
+        ActivityLog,
+        [{'user_id': bots[i].id, 'date': today, 'exercises_done': int(counts[i])} for i in active],
+        keys=('user_id', 'date'),
+        counters=('exercises_done',)
+    )
+    award_badges_bulk([bots[i].id for i in active])
+
+    return len(submission_rows)
+
+
+# List of possible names for generating fake users
+FIRST_NAMES = [
+    'Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Ethan', 'Sophia', 'Mason',
+    'Isabella', 'William', 'Mia', 'James', 'Charlotte', 'Benjamin', 'Amelia',
+    'Lucas', 'Harper', 'Henry', 'Evelyn', 'Alexander', 'Abigail', 'Michael',
+    'Emily', 'Daniel', 'Elizabeth', 'Matthew', 'Sofia', 'Jackson', 'Avery',
+    'Sebastian', 'Ella', 'David', 'Scarlett', 'Joseph', 'Grace', 'Samuel',
+    'Chloe', 'John', 'Victoria', 'Owen', 'Riley', 'Dylan', 'Aria', 'Luke',
+    'Lily', 'Gabriel', 'Aubrey', 'Anthony', 'Zoey', 'Isaac', 'Penelope'
+]
+
+SUFFIXES = [
+    'math', 'brain', 'genius', 'pro', 'ace', 'star', 'master', 'champ',
+    'whiz', 'solver', 'ninja', 'legend', 'wizard', 'expert', 'scholar',
+    'student', 'learner', 'thinker', 'keen', 'smart', 'bright', 'swift'
+]
+
+BOT_PASSWORD = 'password123'
+
+# Rows per bulk INSERT batch when generating bots
+BOT_CHUNK_SIZE = 5000
+
+_bot_password_hash = None
+
+
+def bot_password_hash():
+    """Hash the shared bot password once per process instead of once per bot."""
+    global _bot_password_hash
+    if _bot_password_hash is None:
+        _bot_password_hash = generate_password_hash(BOT_PASSWORD)
+    return _bot_password_hash
+
+
+def random_competitiveness():
+    """Pick a competitiveness tier: 33% high, 20% low, 47% medium."""
+    tier_roll = random.random()
+    if tier_roll < 0.33:
+        return random.uniform(0.7, 0.9)
+    if tier_roll < 0.53:
+        return random.uniform(0.1, 0.3)
+    return random.uniform(0.4, 0.6)
+
+
+class NameReservation:
+    """Hands out usernames not yet in the users table.
+    
+    The taken usernames and emails are loaded once; when a name is taken a
+    number is appended instead of probing the database again.
+    """
+    
+    def __init__(self):
+        self.taken = set()
+        for username, email in db.session.query(User.username, User.email):
+            self.taken.add(username.lower())
+            self.taken.add(email.lower())
+        self.counters = {}
+    
+    def is_free(self, username):
+        return (username.lower() not in self.taken
+                and f'{username}@example.com'.lower() not in self.taken)
+    
+    def reserve(self, username):
+        """Return `username`, or `username` plus the next free number."""
+        candidate = username
+        while not self.is_free(candidate):
+            self.counters[username] = self.counters.get(username, 1) + 1
+            candidate = f'{username}{self.counters[username]}'
+        self.taken.add(candidate.lower())
+        self.taken.add(f'{candidate}@example.com'.lower())
+        return candidate
+
+
+def generate_bots(count=None, profiles=None, exercise_range=(1, 15), joined_days_range=(0, 7),
+                  streak_range=(0, 10), longest_range_max=20, chunk_size=BOT_CHUNK_SIZE):
+    """Create bots with initial activity using bulk INSERTs.
+    
+    Either `count` random bots, or one bot per profile dict (username, nickname
+    and optionally email/competitiveness) for profiles whose username is free.
+    All bots share one pre-computed password hash. Users, submissions, activity
+    logs, leaderboard entries, rollups and badges are written `chunk_size` bots
+    at a time.
+    Returns the ids of the new bots; nothing here commits.
+    """
+    exercises = catalog_exercises()
+    if not exercises:
+        return []
+
+    names = NameReservation()
+    if profiles is None:
+        profiles = []
+        for _ in range(count or 0):
+            first_name = random.choice(FIRST_NAMES)
+            username = names.reserve(f"{first_name.lower()}_{random.choice(SUFFIXES)}")
+            profiles.append({'username': username, 'nickname': first_name})
+    else:
+        profiles = [profile for profile in profiles if names.is_free(profile['username'])]
+
+    password_hash = bot_password_hash()
+    created_ids = []
+    for offset in range(0, len(profiles), chunk_size):
+        chunk = profiles[offset:offset + chunk_size]
+        created_ids.extend(_insert_bot_chunk(
+            chunk, exercises, password_hash, exercise_range, joined_days_range,
+            streak_range, longest_range_max
+        ))
+    return created_ids
+
+
+def _insert_bot_chunk(profiles, exercises, password_hash, exercise_range, joined_days_range,
+                      streak_range, longest_range_max):
+    """Insert one chunk of bots and their initial activity."""
+    now = datetime.utcnow()
+    week_start, month_start, year_start = period_starts()
+
+    user_rows = []
+    activities = []
+    for profile in profiles:
+        date_joined = now - timedelta(days=random.randint(*joined_days_range))
+        days_since_join = (now - date_joined).days
+        selected = random.sample(exercises, min(random.randint(*exercise_range), len(exercises)))
+        # Random submission dates (within their lifetime)
+        submitted = [(exercise, now - timedelta(days=random.randint(0, max(days_since_join, 0))))
+                     for exercise in selected]
+        activities.append(submitted)
+
+        streak_days = random.randint(*streak_range)
+        user_rows.append({
+            'username': profile['username'],
+            'nickname': profile['nickname'],
+            'email': profile.get('email') or f"{profile['username']}@example.com",
+            'password_hash': password_hash,
+            'public_profile': True,
+            'public_stats': True,
+            'public_activity': True,
+            'show_leaderboard': True,
+            'is_fake': True,
+            'competitiveness': profile.get('competitiveness') or random_competitiveness(),
+            'team': random.choice(['red', 'blue', 'green']),
+            'companion_id': random.randint(1, 5),
+            'date_joined': date_joined,
+            'streak_days': streak_days,
+            'longest_streak': random.randint(streak_days, max(streak_days, longest_range_max)),
+            'last_active_date': max((created_at.date() for _, created_at in submitted), default=None),
+            'total_points': sum(exercise.points for exercise in selected)
+        })
+
+    user_ids = db.session.scalars(
+        insert(User.__table__).returning(User.__table__.c.id, sort_by_parameter_order=True), user_rows
+    ).all()
+
+    submission_rows = []
+    rollup_items = []
+    ledger_rows = []
+    entries = []
+    activity_counts = defaultdict(int)
+    for user_id, user_row, submitted in zip(user_ids, user_rows, activities):
+        for exercise, created_at in submitted:
+            submission_rows.append({
+                'user_id': user_id,
+                'exercise_id': exercise.id,
+                'filename': f'ai_solution_{user_id}_{exercise.id}.pdf',
+                'created_at': created_at,
+                'status': 'submitted',
+                'points_earned': exercise.points
+            })
+            rollup_items.append((user_id, created_at, exercise.book_id, exercise.category, exercise.points))
+            if exercise.points:
+                ledger_rows.append({'user_id': user_id, 'kind': SUBMISSION, 'points': exercise.points,
+                                    'exercise_id': exercise.id, 'book_id': exercise.book_id,
+                                    'created_at': created_at})
+            activity_counts[(user_id, created_at.date())] += 1
+        days = [created_at.date() for _, created_at in submitted]
+        entries.append({
+            'user_id': user_id,
+            'total_exercises': len(submitted),
+            'total_points': user_row['total_points'],
+            'week_exercises': sum(day >= week_start for day in days),
+            'month_exercises': sum(day >= month_start for day in days),
+            'year_exercises': sum(day >= year_start for day in days)
+        })
+
+    db.session.execute(insert(Submission.__table__), submission_rows)
+    record_points_bulk(ledger_rows)
+    db.session.execute(insert(ActivityLog.__table__), [
+        {'user_id': user_id, 'date': day, 'exercises_done': exercises_done}
+        for (user_id, day), exercises_done in activity_counts.items()
+    ])
+    record_submissions_bulk(entries)
+    record_activity_bulk(rollup_items)
+    award_badges_bulk(user_ids)
+    return user_ids
+
+
+def create_random_fake_users(submissions=1, limit=None):
+    """Create 1-5 random new fake users with activity per submission, at most `limit` in all."""
+    count = sum(random.randint(1, 5) for _ in range(submissions))
+    if limit is not None:
+        count = min(count, limit)
+    return len(generate_bots(count))
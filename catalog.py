@@ -0,0 +1,237 @@
+"""
+Process-wide snapshot of the book catalog (books, chapters and exercises).
+
+The catalog only changes when scripts such as add_chapter2.py run, so each app
+loads it once into immutable tuples and shares it across requests. Those
+scripts call bump_catalog_version(); every request compares the stored
+version with a single-row SELECT and reloads the snapshot when it moved.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from flask import current_app, g, has_request_context
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from models import db, Book, Chapter, Exercise, CatalogVersion
+from routing import primary_reads
+from metrics import record_cache
+from scoring import base_points, chapter_points, points_table, variant
+
+
+BookInfo = namedtuple('BookInfo', [
+    'id', 'slug', 'title', 'author', 'description', 'category', 'topic',
+    'chapter_ids',      # ordered by chapter number
+    'exercise_ids',     # every exercise of the book, chapter by chapter
+    'total_exercises',
+    'total_points'
+])
+
+ChapterInfo = namedtuple('ChapterInfo', [
+    'id', 'book_id', 'number', 'title',
+    'book',             # the chapter's BookInfo
+    'exercise_ids',     # ordered by exercise number
+    'sections',         # {section number: exercise ids}, unsectioned exercises under 0
+    'section_points',   # {section number: sum of exercise points}
+    'total_points',
+    'points'            # scoring.ChapterPoints: reading value and bonuses
+])
+
+
+class ExerciseInfo(namedtuple('ExerciseInfo', [
+    'id', 'chapter_id', 'book_id', 'category', 'chapter_number', 'section', 'number',
+    'difficulty', 'points', 'is_last_in_section',
+    'is_reading',       # the only exercise of its section ("reading completion")
+    'points_table',     # points for every bonus combination, see scoring.variant()
+    'bit'               # position in the book's exercise_ids, for completion bitsets
+])):
+    """Immutable exercise row; mirrors the Exercise methods that need no database.
+
+    `points` is the exercise's value without bonuses (points_table[0]).
+    """
+    __slots__ = ()
+
+    def get_display_number(self):
+        if self.section:
+            return f"{self.chapter_number}.{self.section}.{self.number}"
+        return f"{self.chapter_number}.{self.number}"
+
+    def calculate_points(self, is_last_in_section=False, is_section_complete=False, is_chapter_complete=False):
+        return self.points_table[variant(is_last_in_section, is_section_complete, is_chapter_complete)]
+
+
+class Catalog:
+    """Read-only lookup tables for one catalog version."""
+
+    def __init__(self, version, books, chapters, exercises):
+        self.version = version
+        self.books = MappingProxyType(books)
+        self.chapters = MappingProxyType(chapters)
+        self.exercises = MappingProxyType(exercises)
+        self.books_by_slug = MappingProxyType({book.slug: book for book in books.values()})
+
+    def book_by_slug(self, slug):
+        return self.books_by_slug.get(slug)
+
+    def book_chapters(self, book_id):
+        """Chapters of a book, ordered by number."""
+        book = self.books.get(book_id)
+        return [self.chapters[chapter_id] for chapter_id in book.chapter_ids] if book else []
+
+    def chapter_exercises(self, chapter_id):
+        """Exercises of a chapter, ordered by number."""
+        return [self.exercises[exercise_id] for exercise_id in self.chapters[chapter_id].exercise_ids]
+
+    def books_by_title(self):
+        return sorted(self.books.values(), key=lambda book: book.title)
+
+    def all_chapters(self):
+        """Every chapter, ordered by book and number."""
+        return [chapter for book_id in sorted(self.books) for chapter in self.book_chapters(book_id)]
+
+
+def current_version():
+    """Catalog version stored in the database (0 before the first bump)."""
+    return db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+
+
+def bump_catalog_version():
+    """Mark the catalog as changed so every process reloads it.
+
+    Call this in the same transaction as the change to books, chapters or
+    exercises; it doesn't commit.
+    """
+    updated = CatalogVersion.query.filter_by(id=1)\
+        .update({CatalogVersion.version: CatalogVersion.version + 1}, synchronize_session=False)
+    if not updated:
+        db.session.add(CatalogVersion(id=1, version=1))
+
+
+def load_catalog():
+    """Build a snapshot from three queries."""
+    version = current_version()
+    books = Book.query.order_by(Book.id).all()
+    chapters = Chapter.query.order_by(Chapter.book_id, Chapter.number, Chapter.id).all()
+    exercises = db.session.query(
+        Exercise.id, Exercise.chapter_id, Exercise.section, Exercise.number, Exercise.difficulty
+    ).order_by(Exercise.chapter_id, Exercise.number, Exercise.id).all()
+
+    chapter_exercises = {chapter.id: [] for chapter in chapters}
+    for exercise in exercises:
+        if exercise.chapter_id in chapter_exercises:
+            chapter_exercises[exercise.chapter_id].append(exercise)
+
+    # Last exercise (by number) of each section
+    last_in_section = {}
+    for chapter_id, rows in chapter_exercises.items():
+        for exercise in rows:
+            if exercise.section:
+                key = (chapter_id, exercise.section)
+                current = last_in_section.get(key)
+                if current is None or (exercise.number, exercise.id) > (current.number, current.id):
+                    last_in_section[key] = exercise
+    last_ids = {exercise.id for exercise in last_in_section.values()}
+
+    # Scoring table of every exercise; a section's only exercise is its reading completion
+    section_sizes = {}
+    for exercise in exercises:
+        if exercise.section:
+            key = (exercise.chapter_id, exercise.section)
+            section_sizes[key] = section_sizes.get(key, 0) + 1
+    chapter_numbers = {chapter.id: chapter.number for chapter in chapters}
+    reading_ids = set()
+    tables = {}
+    for exercise in exercises:
+        if exercise.chapter_id not in chapter_numbers:
+            continue
+        is_reading = section_sizes.get((exercise.chapter_id, exercise.section)) == 1
+        if is_reading:
+            reading_ids.add(exercise.id)
+        tables[exercise.id] = points_table(base_points(exercise.difficulty, is_reading),
+                                           chapter_numbers[exercise.chapter_id])
+
+    book_chapter_ids = {book.id: [] for book in books}
+    for chapter in chapters:
+        if chapter.book_id in book_chapter_ids:
+            book_chapter_ids[chapter.book_id].append(chapter.id)
+
+    book_infos = {}
+    for book in books:
+        exercise_ids = tuple(row.id for chapter_id in book_chapter_ids[book.id]
+                             for row in chapter_exercises[chapter_id])
+        book_infos[book.id] = BookInfo(
+            id=book.id, slug=book.slug, title=book.title, author=book.author,
+            description=book.description, category=book.category, topic=book.topic,
+            chapter_ids=tuple(book_chapter_ids[book.id]),
+            exercise_ids=exercise_ids,
+            total_exercises=len(exercise_ids),
+            total_points=sum(tables[exercise_id][0] for exercise_id in exercise_ids)
+        )
+
+    bits = {exercise_id: position for book in book_infos.values()
+            for position, exercise_id in enumerate(book.exercise_ids)}
+
+    chapter_infos = {}
+    exercise_infos = {}
+    for chapter in chapters:
+        book = book_infos.get(chapter.book_id)
+        if book is None:
+            continue
+        rows = chapter_exercises[chapter.id]
+        sections = {}
+        section_points = {}
+        for exercise in rows:
+            section = exercise.section or 0
+            sections.setdefault(section, []).append(exercise.id)
+            table = tables[exercise.id]
+            section_points[section] = section_points.get(section, 0) + table[0]
+            exercise_infos[exercise.id] = ExerciseInfo(
+                id=exercise.id, chapter_id=chapter.id, book_id=book.id, category=book.category,
+                chapter_number=chapter.number, section=exercise.section, number=exercise.number,
+                difficulty=exercise.difficulty, points=table[0],
+                is_last_in_section=exercise.id in last_ids,
+                is_reading=exercise.id in reading_ids,
+                points_table=table,
+                bit=bits[exercise.id]
+            )
+        chapter_infos[chapter.id] = ChapterInfo(
+            id=chapter.id, book_id=book.id, number=chapter.number, title=chapter.title, book=book,
+            exercise_ids=tuple(row.id for row in rows),
+            sections=MappingProxyType({number: tuple(ids) for number, ids in sections.items()}),
+            section_points=MappingProxyType(section_points),
+            total_points=sum(section_points.values()),
+            points=chapter_points(chapter.number)
+        )
+
+    return Catalog(version, book_infos, chapter_infos, exercise_infos)
+
+
+def init_catalog(app):
+    """Load the catalog when the app is created (later, lazily, if tables are missing)."""
+    app.extensions['catalog'] = None
+    with app.app_context():
+        try:
+            app.extensions['catalog'] = load_catalog()
+        except (OperationalError, ProgrammingError):
+            # Fresh database without tables yet (init_db.py, migrations)
+            db.session.rollback()
+
+
+def get_catalog():
+    """The current app's catalog, reloaded if another process bumped the version.
+
+    Inside a request the version is checked once per request.
+    """
+    catalog = current_app.extensions.get('catalog')
+    if has_request_context():
+        if catalog is not None and g.get('catalog_checked'):
+            return catalog
+        g.catalog_checked = True
+
+    # A lagging replica would flip the snapshot back to an older version
+    with primary_reads():
+        stale = catalog is None or catalog.version != current_version()
+    record_cache('catalog', hit=not stale)
+    if stale:
+        catalog = load_catalog()
+        current_app.extensions['catalog'] = catalog
+    return catalog
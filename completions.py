@@ -0,0 +1,170 @@
+"""
+Per-user, per-book completion bitsets.
+
+Bit i of a user's bitset for a book is set once they have completed the i-th
+exercise of that book in catalog order (ExerciseInfo.bit). Bitsets live in the
+completion_bitmaps table next to the submissions, are updated by the
+submission routes and memoized per request, so "is this exercise done" is a
+bit test and book progress is a popcount. A row built against an older catalog
+version is rebuilt from the submissions table on first use. Read routes
+never commit, so a bitset rebuilt while serving one is saved in its own short
+transaction on the primary, and only over a missing or stale row.
+
+Concurrent submissions by the same user OR their bits into the same row, so
+add_completions() locks it (SELECT ... FOR UPDATE on PostgreSQL; SQLite
+serializes writers anyway) and reads the latest committed bits before adding
+to them.
+"""
+from flask import g, has_request_context
+from sqlalchemy.exc import OperationalError
+
+from models import db, Exercise, Submission, CompletionBitmap
+from catalog import get_catalog
+from dbutils import dialect_insert, insert_ignore
+from metrics import record_cache
+from routing import primary_reads
+
+
+def _to_bytes(bits):
+    return bits.to_bytes(max(1, (bits.bit_length() + 7) // 8), 'little')
+
+
+def _memo():
+    """Bitsets already looked up in this request, keyed by (user_id, book_id)."""
+    if has_request_context():
+        return g.setdefault('completion_bits', {})
+    return {}
+
+
+def _build_bits(user_id, book, catalog):
+    """Rebuild a bitset from the user's submissions in the book."""
+    bits = 0
+    rows = db.session.query(Submission.exercise_id)\
+        .join(Exercise, Submission.exercise_id == Exercise.id)\
+        .filter(Submission.user_id == user_id, Exercise.chapter_id.in_(book.chapter_ids))
+    for (exercise_id,) in rows:
+        exercise = catalog.exercises.get(exercise_id)
+        if exercise is not None:
+            bits |= 1 << exercise.bit
+    return bits
+
+
+def _store(user_id, book_id, bits, catalog, row=None):
+    if row is None:
+        # Another request may be creating the same row; either one is current
+        insert_ignore(CompletionBitmap, [{'user_id': user_id, 'book_id': book_id,
+                                          'catalog_version': catalog.version, 'bits': _to_bytes(bits)}],
+                      ['user_id', 'book_id'])
+    else:
+        row.catalog_version = catalog.version
+        row.bits = _to_bytes(bits)
+    _memo()[(user_id, book_id)] = bits
+
+
+def _save_rebuilt(user_id, book_id, bits, catalog):
+    """Save a bitset rebuilt on a read path, outside the request's transaction."""
+    table = CompletionBitmap.__table__
+    stmt = dialect_insert('_save_rebuilt')(table).values(
+        user_id=user_id, book_id=book_id, catalog_version=catalog.version, bits=_to_bytes(bits))
+    # A row already at this version was written by a submission and may hold newer bits
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.book_id],
+        set_={'catalog_version': stmt.excluded.catalog_version, 'bits': stmt.excluded.bits},
+        where=table.c.catalog_version < stmt.excluded.catalog_version)
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(stmt)
+    except OperationalError:
+        # Primary busy or locked: the bits are still served, the next request retries
+        pass
+    _memo()[(user_id, book_id)] = bits
+
+
+def _locked_row(user_id, book_id):
+    """The user's bitmap row for a book, created if missing and locked until commit."""
+    insert_ignore(CompletionBitmap, [{'user_id': user_id, 'book_id': book_id,
+                                      'catalog_version': -1, 'bits': _to_bytes(0)}],
+                  ['user_id', 'book_id'])
+    return CompletionBitmap.query.filter_by(user_id=user_id, book_id=book_id)\
+        .populate_existing().with_for_update().one()
+
+
+def get_completion_bits(user_id, book_id):
+    """The user's completion bitset for a book, as a Python int."""
+    memo = _memo()
+    if (user_id, book_id) in memo:
+        return memo[(user_id, book_id)]
+
+    catalog = get_catalog()
+    book = catalog.books.get(book_id)
+    if book is None:
+        return 0
+
+    row = db.session.get(CompletionBitmap, (user_id, book_id))
+    current = row is not None and row.catalog_version == catalog.version
+    record_cache('completion_bitmap', hit=current)
+    if current:
+        bits = int.from_bytes(row.bits, 'little')
+        memo[(user_id, book_id)] = bits
+        return bits
+
+    # What gets saved must not come from a lagging replica
+    with primary_reads():
+        bits = _build_bits(user_id, book, catalog)
+    if db.session.info.get('wrote'):
+        # A write route: the row goes into its transaction
+        _store(user_id, book_id, bits, catalog, row)
+    else:
+        _save_rebuilt(user_id, book_id, bits, catalog)
+    return bits
+
+
+def completed_exercise_ids(user_id, book_id):
+    """Ids of the exercises of a book the user has completed."""
+    bits = get_completion_bits(user_id, book_id)
+    book = get_catalog().books.get(book_id)
+    if not bits or book is None:
+        return set()
+    return {exercise_id for position, exercise_id in enumerate(book.exercise_ids) if bits >> position & 1}
+
+
+def book_progress(user_id, book_id):
+    """Completion percentage of a book, from a popcount."""
+    book = get_catalog().books.get(book_id)
+    if book is None or not book.total_exercises:
+        return 0
+    return int((get_completion_bits(user_id, book_id).bit_count() / book.total_exercises) * 100)
+
+
+def add_completions(user_id, exercises):
+    """Set the bits for newly submitted exercises (catalog ExerciseInfo rows)."""
+    masks = {}
+    for exercise in exercises:
+        masks[exercise.book_id] = masks.get(exercise.book_id, 0) | (1 << exercise.bit)
+
+    catalog = get_catalog()
+    for book_id, mask in masks.items():
+        row = _locked_row(user_id, book_id)
+        if row.catalog_version == catalog.version:
+            bits = int.from_bytes(row.bits, 'little')
+        else:
+            # New (version -1) or stale row: rebuild; this sees the batch's own submissions
+            bits = _build_bits(user_id, catalog.books[book_id], catalog)
+        _store(user_id, book_id, bits | mask, catalog, row)
+
+
+def clear_completions(user_id, book_id):
+    """Forget a user's bitset for a book after its submissions were deleted."""
+    CompletionBitmap.query.filter_by(user_id=user_id, book_id=book_id)\
+        .delete(synchronize_session=False)
+    _memo().pop((user_id, book_id), None)
+
+
+def invalidate_completions(user_ids):
+    """Drop stored bitsets of users whose submissions were written in bulk.
+
+    `user_ids` may be a list or a SELECT of user ids; the rows are rebuilt on
+    next use.
+    """
+    CompletionBitmap.query.filter(CompletionBitmap.user_id.in_(user_ids))\
+        .delete(synchronize_session=False)
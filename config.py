@@ -2,6 +2,36 @@ import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def _sqlalchemy_url(url):
+    # Hosting providers hand out postgres:// URLs, which SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def database_url():
+    """DATABASE_URL, or the SQLite file in instance/ when it isn't set."""
+    return _sqlalchemy_url(os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'instance', 'app.db'))
+
+
+def replica_binds():
+    """SQLALCHEMY_BINDS for the read replicas in DATABASE_REPLICA_URLS (comma-separated).
+
+    The entry "readonly" stands for the primary SQLite file opened read-only.
+    """
+    binds = {}
+    urls = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    for i, url in enumerate(urls):
+        if url == 'readonly':
+            primary = database_url()
+            if not primary.startswith('sqlite:///'):
+                raise ValueError('DATABASE_REPLICA_URLS=readonly needs a SQLite DATABASE_URL')
+            url = f"sqlite:///file:{primary[len('sqlite:///'):]}?mode=ro&uri=true"
+        binds[f'replica_{i}'] = _sqlalchemy_url(url)
+    return binds
+
+
 class Config:
     """Flask application configuration."""
     
@@ -9,9 +39,39 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production-1234567890'
     
     # Database
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        'sqlite:///' + os.path.join(basedir, 'instance', 'app.db')
+    SQLALCHEMY_DATABASE_URI = database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Per process: keep (pool_size + max_overflow) x processes under PostgreSQL's max_connections
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),  # Connections kept open per process
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),  # Extra connections allowed under bursts
+        'pool_timeout': 30,  # Seconds to wait for a free connection
+        'pool_recycle': 1800,  # Reopen connections after 30 minutes, before server/proxy idle timeouts
+        'pool_pre_ping': True,  # Test connections on checkout so a database restart isn't a request error
+    }
+    
+    # Read replicas for the read-heavy pages (see routing.py)
+    SQLALCHEMY_BINDS = replica_binds()
+    READ_YOUR_WRITES_SECONDS = 5  # After a write, the same browser session reads from the primary this long
+    
+    # SQLite production profile, applied to every new connection (see database.py)
+    SQLITE_PRAGMAS = {
+        'busy_timeout': 5000,  # Milliseconds a writer waits for the lock before "database is locked"
+        'journal_mode': 'WAL',  # Readers don't block on a writer (persists in the database file)
+        'synchronous': 'NORMAL',  # fsync at checkpoints only; safe with WAL
+        'cache_size': -64000,  # Negative = KiB: 64 MB page cache per connection
+        'mmap_size': 256 * 1024 * 1024,  # Read pages through a 256 MB memory map
+        'temp_store': 'MEMORY',  # Temp tables and sort spills in memory
+    }
+    
+    # Query instrumentation (see querystats.py)
+    SLOW_QUERY_MS = 100  # Statements slower than this are logged with their route (None: off)
+    N_PLUS_ONE_THRESHOLD = 10  # The same statement shape this often in one request is a suspected N+1
+    QUERY_STATS_LOG = True  # Log each request's query totals (outside debug mode)
+    QUERY_STATS_HEADERS = False  # X-Query-* response headers outside debug mode too
+    
+    # Prometheus metrics at /metrics (see metrics.py)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # If set, scrapes must send "Authorization: Bearer <token>"
     
     # File uploads
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
@@ -20,3 +80,14 @@ class Config:
     
     # Flask-Login
     REMEMBER_COOKIE_DURATION = 7 * 24 * 60 * 60  # 7 days
+    
+    # Leaderboard
+    LEADERBOARD_PAGE_SIZE = 50  # Rows per keyset page on the leaderboard
+    
+    # Background jobs (worker.py)
+    JOB_BATCH_SIZE = 50  # Jobs claimed per batch
+    JOB_MAX_ATTEMPTS = 5  # Attempts before a job is marked failed
+    JOB_RETRY_BACKOFF = 10  # Seconds before the first retry; doubles each attempt
+    JOB_LEASE_SECONDS = 300  # A running job not finished by then is claimed again (its worker died)
+    JOB_POLL_INTERVAL = 2  # Seconds between polls when the queue is empty
+    MAX_NEW_BOTS_PER_BATCH = 20  # Bots created for one batch of real submissions, at most
@@ -0,0 +1,88 @@
+"""
+SQLite production profile and maintenance.
+
+SQLite's defaults (rollback journal, full fsync on every commit, a 2 MB page
+cache) make every reader wait behind each submission commit. init_database()
+registers a "connect" hook on SQLite engines that applies Config.SQLITE_PRAGMAS
+to every new pooled connection: WAL journaling lets readers keep reading the
+last committed snapshot while one writer commits, synchronous=NORMAL only
+fsyncs at checkpoints, and busy_timeout makes writers queue instead of failing
+with "database is locked". Read-only replica connections (routing.py) get
+the same pragmas except journal_mode. Other databases are left untouched.
+
+run_maintenance() is the periodic half (maintain_db.py): PRAGMA optimize or a
+full ANALYZE, then a WAL checkpoint so the -wal file doesn't keep growing.
+"""
+import os
+
+from sqlalchemy import event
+
+from models import db
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Run PRAGMA name = value for each pragma on a raw DB-API connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def init_database(app):
+    """Apply the app's SQLITE_PRAGMAS to every new connection of its SQLite engines."""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        if engine.dialect.name != 'sqlite':
+            continue
+        if engine.url.query.get('mode') == 'ro':
+            # Read-only replica (routing.py): the journal mode is stored in the file and can't be set here
+            _register_pragmas(engine, {name: value for name, value in pragmas.items() if name != 'journal_mode'})
+        else:
+            _register_pragmas(engine, pragmas)
+
+
+def _register_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def sqlite_status(connection):
+    """Journal mode, page counts and -wal file size of a SQLite database."""
+    database = connection.engine.url.database
+    wal_path = f'{database}-wal' if database else None
+    return {
+        'journal_mode': connection.exec_driver_sql('PRAGMA journal_mode').scalar(),
+        'page_count': connection.exec_driver_sql('PRAGMA page_count').scalar(),
+        'freelist_count': connection.exec_driver_sql('PRAGMA freelist_count').scalar(),
+        'wal_bytes': os.path.getsize(wal_path) if wal_path and os.path.exists(wal_path) else 0,
+    }
+
+
+def run_maintenance(analyze=False, checkpoint='TRUNCATE'):
+    """Refresh planner statistics and checkpoint the WAL of a SQLite database.
+
+    PRAGMA optimize only re-analyzes tables whose statistics look stale, which
+    is cheap enough to run often; `analyze` runs a full ANALYZE instead. The
+    checkpoint copies the WAL back into the database file (TRUNCATE also
+    shrinks the -wal file to zero) and can only finish once no reader is
+    still using older frames. Returns (status before, status after,
+    (busy, wal frames, frames checkpointed)).
+    """
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if connection.dialect.name != 'sqlite':
+            raise NotImplementedError(f'run_maintenance does not support {connection.dialect.name}')
+
+        before = sqlite_status(connection)
+        connection.exec_driver_sql('ANALYZE' if analyze else 'PRAGMA optimize')
+        result = tuple(connection.exec_driver_sql(f'PRAGMA wal_checkpoint({checkpoint})').one())
+        after = sqlite_status(connection)
+    return before, after, result
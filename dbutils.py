@@ -0,0 +1,58 @@
+"""
+Small dialect-aware SQL helpers shared by the bulk write paths.
+
+The write helpers here and in leaderboard.py, submissions.py, badges.py,
+rollups.py, ledger.py and completions.py only add to the session; the calling
+route (or script) owns the transaction and commits it.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db
+
+
+def dialect_insert(helper):
+    """The INSERT construct with ON CONFLICT support for the session's database."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert
+    if dialect == 'sqlite':
+        return sqlite.insert
+    raise NotImplementedError(f'{helper} does not support {dialect}')
+
+
+def insert_or_increment(model, rows, keys, counters):
+    """Bulk INSERT rows, adding `counters` onto existing rows that clash on `keys`.
+
+    Emits a single INSERT ... ON CONFLICT (keys) DO UPDATE SET c = c + excluded.c
+    for SQLite and PostgreSQL. `keys` must match a unique constraint on the table.
+    """
+    if not rows:
+        return
+
+    insert = dialect_insert('insert_or_increment')
+    table = model.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={column: table.c[column] + stmt.excluded[column] for column in counters}
+    )
+    db.session.execute(stmt, rows)
+
+
+def insert_ignore(model, rows, keys, returning=None):
+    """Bulk INSERT rows, skipping any that clash on `keys`.
+
+    Emits INSERT ... ON CONFLICT (keys) DO NOTHING for SQLite and PostgreSQL.
+    With `returning` (column names), returns those columns of the rows that
+    were actually inserted.
+    """
+    if not rows:
+        return [] if returning else None
+
+    insert = dialect_insert('insert_ignore')
+    table = model.__table__
+    stmt = insert(table).on_conflict_do_nothing(index_elements=[table.c[key] for key in keys])
+    if returning:
+        stmt = stmt.returning(*[table.c[column] for column in returning])
+        return db.session.execute(stmt, rows).all()
+    db.session.execute(stmt, rows)
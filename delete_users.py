@@ -1,5 +1,5 @@
 from app import create_app
-from models import db, User, BookRequest, Submission, ReadingSection, ActivityLog, WeeklyPlan
+from models import db, User, BookRequest, Submission, ReadingSection, ActivityLog, WeeklyPlan, CompletionBitmap, UserBadge, PointsEvent
 
 app = create_app()
 
@@ -16,6 +16,9 @@ with app.app_context():
         # Delete related data first
         book_requests_deleted = BookRequest.query.filter_by(user_id=user_id).delete()
         submissions_deleted = Submission.query.filter_by(user_id=user_id).delete()
+        CompletionBitmap.query.filter_by(user_id=user_id).delete()
+        UserBadge.query.filter_by(user_id=user_id).delete()
+        PointsEvent.query.filter_by(user_id=user_id).delete()
         reading_sections_deleted = ReadingSection.query.filter_by(user_id=user_id).delete()
         activity_logs_deleted = ActivityLog.query.filter_by(user_id=user_id).delete()
         weekly_plans_deleted = WeeklyPlan.query.filter_by(user_id=user_id).delete()
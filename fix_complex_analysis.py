@@ -2,6 +2,7 @@
 Fix the Complex Analysis book structure.
 """
 from app import create_app
+from catalog import bump_catalog_version
 from models import db, Book, Chapter, Exercise
 
 def fix_complex_analysis():
@@ -70,6 +71,7 @@ def fix_complex_analysis():
                 total_exercises += 1
         
         # Commit all changes
+        bump_catalog_version()
         db.session.commit()
         print(f"\n✓ Successfully fixed '{book.title}'!")
         print(f"  Chapter 1: Complex Numbers and Functions")
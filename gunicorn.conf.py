@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for running the app with several worker processes:
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Sets PROMETHEUS_MULTIPROC_DIR (default instance/prometheus) so /metrics adds
+up the metrics of every worker process (see metrics.py). Start worker.py
+with the same PROMETHEUS_MULTIPROC_DIR to include the bot simulation metrics.
+"""
+import os
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+bind = os.environ.get('BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+# Inherited by the workers, which import prometheus_client after forking
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(basedir, 'instance', 'prometheus'))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def on_starting(server):
+    """Remove metric files left by processes of earlier runs (not a running worker.py's)."""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        # counter_1234.db, histogram_1234.db, ...
+        pid = name.rsplit('_', 1)[-1].split('.')[0]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            os.remove(os.path.join(path, name))
@@ -13,6 +13,10 @@ import os
 from datetime import datetime
 from app import create_app
 from models import db, User, Book, Chapter, Exercise
+from leaderboard import get_entry
+from catalog import bump_catalog_version
+from migrations import stamp
+from revisions import REVISIONS
 
 
 def init_db():
@@ -21,8 +25,15 @@ def init_db():
     
     with app.app_context():
         print("Creating database tables...")
+        is_new = not db.inspect(db.engine).get_table_names()
         db.create_all()
         print("✓ Database tables created successfully!")
+        if is_new:
+            # create_all built the latest schema, so every revision counts as applied
+            stamp(REVISIONS, REVISIONS[-1].version)
+            print(f"✓ Schema version {REVISIONS[-1].version}")
+        else:
+            print("⚠ Existing database: run `python migrate.py` to apply pending schema changes")
         
         # Check if data already exists
         if Book.query.first():
@@ -255,6 +266,7 @@ def seed_data():
         db.session.add(exercise)
     
     # Commit all changes
+    bump_catalog_version()
     db.session.commit()
     
     print(f"✓ Created {Book.query.count()} books")
@@ -280,6 +292,8 @@ def create_demo_user():
         )
         user.set_password('demo123')
         db.session.add(user)
+        db.session.flush()  # Get user.id
+        get_entry(user.id)
         db.session.commit()
         
         print("✓ Demo user created!")
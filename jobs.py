@@ -0,0 +1,158 @@
+"""
+Database-backed background job queue.
+
+Routes enqueue small JSON jobs after their own commit; worker.py claims due
+jobs in batches, runs their handlers and retries failures with exponential
+backoff. Using the app database as the queue means no extra service to run.
+Claimed jobs are leased (Job.locked_until), so the jobs of a worker that
+dies mid-batch go back to the queue once the lease expires.
+"""
+import json
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from models import db, Job
+from bots import simulate_fake_user_progress, create_random_fake_users
+from metrics import BOT_SIMULATION
+
+
+def enqueue(kind, **payload):
+    """Queue a job and commit it on its own, separate from the caller's work."""
+    job = Job(kind=kind, payload=json.dumps(payload), status='pending', attempts=0,
+              run_after=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def handle_real_submissions(payloads):
+    """Let the bots react to a batch of real-user submissions.
+
+    The payloads are merged first (exercises and points summed per user), so
+    the bots are simulated once per batch rather than once per submission, and
+    the new bots of the whole batch are capped at MAX_NEW_BOTS_PER_BATCH.
+    """
+    totals = {}
+    for payload in payloads:
+        exercises, points = totals.get(payload['user_id'], (0, 0))
+        totals[payload['user_id']] = (exercises + payload['exercises'], points + payload['points'])
+
+    with BOT_SIMULATION.time():
+        simulate_fake_user_progress(totals)
+    # New random fake users (1-5) per submission, as before, up to the cap
+    return create_random_fake_users(len(payloads), current_app.config['MAX_NEW_BOTS_PER_BATCH'])
+
+
+# Job kind -> handler taking the list of payloads claimed in one batch
+HANDLERS = {
+    'real_submission': handle_real_submissions,
+}
+
+
+def _claimable(now):
+    """Due pending jobs, and running jobs whose worker let the lease run out."""
+    return or_(
+        and_(Job.status == 'pending', Job.run_after <= now),
+        and_(Job.status == 'running', Job.locked_until < now),
+    )
+
+
+def claim_jobs(limit, max_attempts=5, lease_seconds=300):
+    """Atomically mark up to `limit` due jobs as running and return them.
+
+    A claimed job is leased for `lease_seconds`. Running jobs whose lease has
+    expired (their worker died mid-batch) are claimed again, unless they have
+    used up `max_attempts`, in which case they are marked failed.
+    """
+    now = datetime.utcnow()
+    Job.query.filter(
+        Job.status == 'running',
+        Job.locked_until < now,
+        Job.attempts >= max_attempts
+    ).update({'status': 'failed', 'last_error': 'Lease expired: the worker stopped before finishing',
+              'finished_at': now}, synchronize_session=False)
+
+    candidates = db.session.query(Job.id).filter(_claimable(now)).order_by(Job.id).limit(limit).all()
+
+    claimed = []
+    for (job_id,) in candidates:
+        # Only one worker can take a job while it is pending or its lease has expired
+        updated = Job.query.filter(Job.id == job_id, _claimable(now)).update(
+            {'status': 'running', 'attempts': Job.attempts + 1,
+             'locked_until': now + timedelta(seconds=lease_seconds)},
+            synchronize_session=False
+        )
+        if updated:
+            claimed.append(job_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return Job.query.filter(Job.id.in_(claimed)).order_by(Job.id).all()
+
+
+def _retry_or_fail(job, error, max_attempts, backoff_seconds):
+    """Put a failed job back in the queue with backoff, or give up on it."""
+    job.last_error = error
+    if job.attempts >= max_attempts:
+        job.status = 'failed'
+        job.finished_at = datetime.utcnow()
+    else:
+        job.status = 'pending'
+        job.run_after = datetime.utcnow() + timedelta(seconds=backoff_seconds * 2 ** (job.attempts - 1))
+
+
+def run_batch(limit=50, max_attempts=5, backoff_seconds=10, lease_seconds=300):
+    """Claim and process one batch of jobs; returns the number of jobs handled.
+
+    Jobs of the same kind are processed together in one transaction. If that
+    transaction fails, each job is retried on its own so one bad payload
+    cannot hold back the rest.
+    """
+    jobs = claim_jobs(limit, max_attempts, lease_seconds)
+    if not jobs:
+        return 0
+
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+
+    for kind, kind_jobs in by_kind.items():
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            for job in kind_jobs:
+                _retry_or_fail(job, f'Unknown job kind: {kind}', 0, backoff_seconds)
+            db.session.commit()
+            continue
+
+        try:
+            handler([json.loads(job.payload or '{}') for job in kind_jobs])
+            finished_at = datetime.utcnow()
+            for job in kind_jobs:
+                job.status = 'done'
+                job.finished_at = finished_at
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if len(kind_jobs) == 1:
+                job = db.session.get(Job, kind_jobs[0].id)
+                _retry_or_fail(job, traceback.format_exc(), max_attempts, backoff_seconds)
+                db.session.commit()
+                continue
+            # Retry each job individually
+            for job in kind_jobs:
+                try:
+                    handler([json.loads(job.payload or '{}')])
+                    job.status = 'done'
+                    job.finished_at = datetime.utcnow()
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    job = db.session.get(Job, job.id)
+                    _retry_or_fail(job, traceback.format_exc(), max_attempts, backoff_seconds)
+                    db.session.commit()
+
+    return len(jobs)
@@ -0,0 +1,360 @@
+"""
+Materialized leaderboard: one LeaderboardEntry per user.
+
+Submission paths update a user's entry with single upserts, so the leaderboard
+page is one ORDER BY ... LIMIT read and concurrent submissions keep each
+other's counts.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import case, func
+
+from models import db, User, Submission, ActivityRollup, LeaderboardEntry
+from dbutils import dialect_insert
+
+
+def period_starts(today=None):
+    """Return the (week, month, year) start dates for the given day."""
+    if today is None:
+        today = date.today()
+    week_start = today - timedelta(days=today.weekday())  # Monday of current week
+    month_start = today.replace(day=1)
+    year_start = today.replace(month=1, day=1)
+    return week_start, month_start, year_start
+
+
+def get_entry(user_id):
+    """Get the leaderboard entry for a user, creating an empty one if needed."""
+    entry = db.session.get(LeaderboardEntry, user_id)
+    if entry is None:
+        week_start, month_start, year_start = period_starts()
+        entry = LeaderboardEntry(
+            user_id=user_id,
+            total_exercises=0,
+            total_points=0,
+            week_start=week_start,
+            week_exercises=0,
+            month_start=month_start,
+            month_exercises=0,
+            year_start=year_start,
+            year_exercises=0
+        )
+        db.session.add(entry)
+    return entry
+
+
+def _non_negative(value):
+    return case((value > 0, value), else_=0)
+
+
+def _period_counts(created_ats, starts):
+    """Count how many timestamps fall into the given week/month/year."""
+    week_start, month_start, year_start = starts
+    week = month = year = 0
+    for created_at in created_ats:
+        day = created_at.date() if created_at else date.today()
+        if day >= week_start:
+            week += 1
+        if day >= month_start:
+            month += 1
+        if day >= year_start:
+            year += 1
+    return week, month, year
+
+
+def _upsert_entries(rows):
+    """Add counters onto entries in one INSERT ... ON CONFLICT DO UPDATE.
+
+    Period counters whose period has ended restart from the new values, so
+    the whole change is a single atomic statement per batch.
+    """
+    if not rows:
+        return
+    week_start, month_start, year_start = period_starts()
+
+    table = LeaderboardEntry.__table__
+    stmt = dialect_insert('record_submissions')(table)
+    excluded = stmt.excluded
+    set_ = {
+        'total_exercises': table.c.total_exercises + excluded.total_exercises,
+        'total_points': table.c.total_points + excluded.total_points
+    }
+    for start_column, count_column in (('week_start', 'week_exercises'),
+                                       ('month_start', 'month_exercises'),
+                                       ('year_start', 'year_exercises')):
+        set_[count_column] = case(
+            (table.c[start_column] == excluded[start_column], table.c[count_column] + excluded[count_column]),
+            else_=excluded[count_column]
+        )
+        set_[start_column] = excluded[start_column]
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.user_id], set_=set_)
+    db.session.execute(stmt, [
+        dict(row, week_start=week_start, month_start=month_start, year_start=year_start) for row in rows
+    ])
+
+
+def record_submissions(user_id, created_ats, points):
+    """Add newly created submissions (by their created_at) and points to a user's entry."""
+    week, month, year = _period_counts(created_ats, period_starts())
+    _upsert_entries([{
+        'user_id': user_id,
+        'total_exercises': len(created_ats),
+        'total_points': points,
+        'week_exercises': week,
+        'month_exercises': month,
+        'year_exercises': year
+    }])
+
+
+def remove_submissions(user_id, created_ats, points):
+    """Subtract deleted submissions and points from a user's entry in one UPDATE."""
+    starts = period_starts()
+    week, month, year = _period_counts(created_ats, starts)
+    values = {
+        LeaderboardEntry.total_exercises: _non_negative(LeaderboardEntry.total_exercises - len(created_ats)),
+        LeaderboardEntry.total_points: _non_negative(LeaderboardEntry.total_points - points)
+    }
+    for start_column, count_column, start, removed in (
+        (LeaderboardEntry.week_start, LeaderboardEntry.week_exercises, starts[0], week),
+        (LeaderboardEntry.month_start, LeaderboardEntry.month_exercises, starts[1], month),
+        (LeaderboardEntry.year_start, LeaderboardEntry.year_exercises, starts[2], year)
+    ):
+        values[count_column] = case((start_column == start, _non_negative(count_column - removed)), else_=0)
+        values[start_column] = start
+    LeaderboardEntry.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+
+
+def record_submissions_bulk(rows):
+    """Bulk counterpart of record_submissions for many users in one statement.
+    
+    `rows` are dicts with user_id, total_exercises, total_points and the
+    week/month/year_exercises counts of the new submissions.
+    """
+    _upsert_entries(rows)
+
+
+def sync_points(user):
+    """Copy a user's total_points onto their entry after a points-only change.
+
+    The value is read inside the UPDATE, so it is the committed total even if
+    another request changed it since `user` was loaded.
+    """
+    points = db.session.query(func.coalesce(User.total_points, 0))\
+        .filter(User.id == LeaderboardEntry.user_id).scalar_subquery()
+    LeaderboardEntry.query.filter_by(user_id=user.id)\
+        .update({LeaderboardEntry.total_points: points}, synchronize_session=False)
+
+
+def period_buckets(when, value=1):
+    """Conditional SUM(CASE ...) buckets over rows in the current week/month/year."""
+    week_start, month_start, year_start = period_starts()
+    return tuple(
+        func.coalesce(func.sum(case((when >= start, value), else_=0)), 0)
+        for start in (week_start, month_start, year_start)
+    )
+
+
+def _entry_columns():
+    """Leaderboard columns read from the materialized entries."""
+    week_start, month_start, year_start = period_starts()
+
+    # Stale period counters count as zero until the user's next submission rolls them
+    return {
+        'total_exercises': LeaderboardEntry.total_exercises,
+        'total_points': LeaderboardEntry.total_points,
+        'week_exercises': case((LeaderboardEntry.week_start == week_start, LeaderboardEntry.week_exercises), else_=0),
+        'month_exercises': case((LeaderboardEntry.month_start == month_start, LeaderboardEntry.month_exercises), else_=0),
+        'year_exercises': case((LeaderboardEntry.year_start == year_start, LeaderboardEntry.year_exercises), else_=0)
+    }
+
+
+def _aggregate_subquery(category_filter=None):
+    """Daily activity rollups to aggregate, limited to one book category if given."""
+    query = db.session.query(ActivityRollup.user_id, ActivityRollup.date, ActivityRollup.exercises)
+    if category_filter and category_filter != 'all':
+        query = query.filter(ActivityRollup.category == category_filter)
+    return query.subquery()
+
+
+def scored_subquery(sort_by='total_exercises', team_filter='all', category_filter='all'):
+    """One row per ranked user with every leaderboard column plus a `score` to sort by.
+    
+    Without a category the materialized entries are read directly. With a category
+    every column comes from one GROUP BY users.id aggregate over that category's daily rollups.
+    """
+    if category_filter == 'all':
+        columns = _entry_columns()
+    else:
+        subs = _aggregate_subquery(category_filter)
+        week, month, year = period_buckets(subs.c.date, subs.c.exercises)
+        columns = {
+            'total_exercises': func.coalesce(func.sum(subs.c.exercises), 0),
+            'total_points': func.coalesce(User.total_points, 0),
+            'week_exercises': week,
+            'month_exercises': month,
+            'year_exercises': year
+        }
+
+    sort_columns = dict(columns, streak=User.streak_days, longest_streak=User.longest_streak)
+    sort_column = sort_columns.get(sort_by, columns['total_exercises'])
+
+    query = db.session.query(
+        User.id.label('user_id'),
+        columns['total_exercises'].label('total_exercises'),
+        columns['total_points'].label('total_points'),
+        columns['week_exercises'].label('week_exercises'),
+        columns['month_exercises'].label('month_exercises'),
+        columns['year_exercises'].label('year_exercises'),
+        func.coalesce(sort_column, 0).label('score')
+    )
+
+    if category_filter == 'all':
+        query = query.join(LeaderboardEntry, LeaderboardEntry.user_id == User.id)
+    else:
+        query = query.outerjoin(subs, subs.c.user_id == User.id).group_by(User.id)
+
+    if team_filter != 'all':
+        query = query.filter(User.team == team_filter)
+
+    return query.subquery()
+
+
+def parse_cursor(value):
+    """Parse an `after` cursor of the form "<score>:<user_id>"; None if missing or malformed."""
+    try:
+        score, user_id = value.split(':')
+        return int(score), int(user_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def format_cursor(score, user_id):
+    """Format a keyset cursor for use in a URL."""
+    return f"{score}:{user_id}"
+
+
+def _rank_offsets(scored, first):
+    """Count rows ranked above a page's first row, in one query.
+    
+    Returns (greater, before): rows with a strictly higher score, and rows that sort
+    before the first row at all (higher score, or equal score with a lower user id).
+    """
+    greater, before = db.session.query(
+        func.coalesce(func.sum(case((scored.c.score > first.score, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((
+            (scored.c.score > first.score) |
+            ((scored.c.score == first.score) & (scored.c.user_id < first.user_id)), 1), else_=0)), 0)
+    ).one()
+    return greater, before
+
+
+def get_leaderboard_page(sort_by='total_exercises', team_filter='all', category_filter='all',
+                         limit=50, after=None):
+    """Read one keyset page of the leaderboard, ordered by (score DESC, user_id ASC).
+    
+    `after` is the (score, user_id) of the last row already shown. Returns the page
+    rows and the cursor for the next page (None on the last page). Deep pages cost
+    the same as the first: one LIMIT read plus one count to anchor the ranks.
+    """
+    scored = scored_subquery(sort_by, team_filter, category_filter)
+
+    page = db.session.query(scored)
+    if after:
+        after_score, after_user_id = after
+        page = page.filter(
+            (scored.c.score < after_score) |
+            ((scored.c.score == after_score) & (scored.c.user_id > after_user_id))
+        )
+    page = page.order_by(scored.c.score.desc(), scored.c.user_id).limit(limit + 1).subquery()
+
+    # RANK() over the page only; ranks are shifted by the rows above the page below
+    local_rank = func.rank().over(order_by=page.c.score.desc())
+    rows = db.session.query(User, page, local_rank)\
+        .join(page, page.c.user_id == User.id)\
+        .order_by(page.c.score.desc(), page.c.user_id).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = format_cursor(last.score, last.user_id)
+
+    greater = before = 0
+    if after and rows:
+        greater, before = _rank_offsets(scored, rows[0])
+
+    leaderboard_data = []
+    for row in rows:
+        # Rows tied with the first row share its rank, which may start on an earlier page
+        rank = greater + 1 if row.score == rows[0].score else before + row[-1]
+        user = row[0]
+        leaderboard_data.append({
+            'rank': rank,
+            'user': user,
+            'display_name': user.get_display_name(),
+            'total_exercises': row.total_exercises,
+            'total_points': row.total_points,
+            'streak': user.streak_days,
+            'longest_streak': user.longest_streak,
+            'week_exercises': row.week_exercises,
+            'month_exercises': row.month_exercises,
+            'year_exercises': row.year_exercises,
+            'score': row.score
+        })
+
+    return leaderboard_data, next_cursor
+
+
+def get_leaderboard(sort_by='total_exercises', team_filter='all', category_filter='all', limit=10):
+    """Read the top `limit` leaderboard rows."""
+    leaderboard_data, _ = get_leaderboard_page(sort_by, team_filter, category_filter, limit=limit)
+    return leaderboard_data
+
+
+def get_user_rank(user_id, sort_by='total_exercises', team_filter='all', category_filter='all'):
+    """Compute one user's rank and score with a single counting query.
+    
+    Returns (rank, score), or (None, None) if the user is filtered out of the leaderboard.
+    """
+    scored = scored_subquery(sort_by, team_filter, category_filter)
+    mine = db.session.query(scored.c.score).filter(scored.c.user_id == user_id).scalar_subquery()
+
+    rank, score = db.session.query(
+        func.count(scored.c.user_id) + 1,
+        mine
+    ).filter(scored.c.score > mine).one()
+
+    if score is None:
+        return None, None
+    return rank, score
+
+
+def rebuild_entries():
+    """Recompute every user's entry from the submissions table."""
+    week_start, month_start, year_start = period_starts()
+
+    counts = db.session.query(
+        Submission.user_id,
+        func.count(func.distinct(Submission.exercise_id)),
+        *period_buckets(Submission.created_at)
+    ).group_by(Submission.user_id).all()
+    counts = {row[0]: row[1:] for row in counts}
+
+    LeaderboardEntry.query.delete()
+
+    users = db.session.query(User.id, User.total_points).all()
+    for user_id, total_points in users:
+        total, week, month, year = counts.get(user_id, (0, 0, 0, 0))
+        db.session.add(LeaderboardEntry(
+            user_id=user_id,
+            total_exercises=total or 0,
+            total_points=total_points or 0,
+            week_start=week_start,
+            week_exercises=week or 0,
+            month_start=month_start,
+            month_exercises=month or 0,
+            year_start=year_start,
+            year_exercises=year or 0
+        ))
+
+    return len(users)
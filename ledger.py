@@ -0,0 +1,113 @@
+"""
+Append-only points ledger.
+
+Every points change is a PointsEvent row; users.total_points is their running
+sum, and reconcile() checks it for every user in one pass.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, insert
+
+from models import db, User, PointsEvent, LeaderboardEntry
+
+
+SUBMISSION = 'submission'
+BONUS = 'bonus'
+READING = 'reading'
+REVERSAL = 'reversal'
+PLAN_RESET = 'plan_reset'
+
+
+def record_points(user, events, created_at=None):
+    """Append events for a user and add their sum to users.total_points.
+
+    `events` are dicts with kind and points, plus optional exercise_id,
+    chapter_id, section and book_id; zero-point events are skipped. Totals
+    never go below zero, so deductions larger than the balance are recorded
+    as the points actually taken. Returns the net change.
+    """
+    created_at = created_at or datetime.utcnow()
+    rows = [dict(event, user_id=user.id, created_at=event.get('created_at', created_at))
+            for event in events if event['points']]
+    net = sum(row['points'] for row in rows)
+    if net < 0:
+        # Shrink the deductions, last first, to what add_points can take
+        balance = db.session.query(User.total_points).filter_by(id=user.id).scalar() or 0
+        excess = max(0, -(balance + net))
+        for row in reversed(rows):
+            if excess and row['points'] < 0:
+                kept = min(excess, -row['points'])
+                row['points'] += kept
+                excess -= kept
+        rows = [row for row in rows if row['points']]
+        net = sum(row['points'] for row in rows)
+    if not rows:
+        return 0
+    db.session.execute(insert(PointsEvent.__table__), rows)
+    user.add_points(net)
+    return net
+
+
+def submission_events(scored):
+    """Events for scored (exercise, points) pairs: base points, then any completion bonus."""
+    events = []
+    for exercise, points in scored:
+        base = min(points, exercise.points)
+        events.append({'kind': SUBMISSION, 'points': base, 'exercise_id': exercise.id,
+                       'chapter_id': exercise.chapter_id, 'section': exercise.section,
+                       'book_id': exercise.book_id})
+        if points > base:
+            events.append({'kind': BONUS, 'points': points - base, 'exercise_id': exercise.id,
+                           'chapter_id': exercise.chapter_id, 'section': exercise.section,
+                           'book_id': exercise.book_id})
+    return events
+
+
+def record_points_bulk(rows):
+    """Append events for many users (bots); their totals are updated by the caller.
+
+    `rows` are dicts with user_id, kind, points and created_at plus optional
+    references.
+    """
+    if rows:
+        db.session.execute(insert(PointsEvent.__table__), rows)
+
+
+def ledger_totals():
+    """{user_id: sum of their events}, in one GROUP BY."""
+    return dict(db.session.query(PointsEvent.user_id, func.sum(PointsEvent.points))
+                .group_by(PointsEvent.user_id).all())
+
+
+def reconcile(fix=False):
+    """Compare every user's total_points with their ledger sum.
+
+    Returns [(user_id, total_points, ledger_sum)] for users that drifted. With
+    `fix`, totals and leaderboard entries are set from the ledger in two
+    UPDATEs.
+    """
+    totals = ledger_totals()
+    drift = [
+        (user_id, total or 0, totals.get(user_id, 0) or 0)
+        for user_id, total in db.session.query(User.id, User.total_points).order_by(User.id)
+        if (total or 0) != (totals.get(user_id, 0) or 0)
+    ]
+
+    if fix and drift:
+        ledger_sum = db.session.query(func.coalesce(func.sum(PointsEvent.points), 0))\
+            .filter(PointsEvent.user_id == User.id).scalar_subquery()
+        User.query.update({User.total_points: ledger_sum}, synchronize_session=False)
+        user_total = db.session.query(func.coalesce(User.total_points, 0))\
+            .filter(User.id == LeaderboardEntry.user_id).scalar_subquery()
+        LeaderboardEntry.query.update({LeaderboardEntry.total_points: user_total}, synchronize_session=False)
+    return drift
+
+
+def points_leaderboard(start, end=None, limit=10):
+    """[(user_id, points)] earned in [start, end), highest first."""
+    points = func.sum(PointsEvent.points)
+    query = db.session.query(PointsEvent.user_id, points).filter(PointsEvent.created_at >= start)
+    if end is not None:
+        query = query.filter(PointsEvent.created_at < end)
+    return query.group_by(PointsEvent.user_id).order_by(points.desc(), PointsEvent.user_id)\
+        .limit(limit).all()
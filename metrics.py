@@ -0,0 +1,87 @@
+"""
+Prometheus metrics, served at /metrics in the text exposition format.
+
+The metrics are module-level prometheus_client objects, updated in place:
+request latency, status and per-request SQL (from querystats.py) by
+endpoint, uploaded bytes, submitted exercises, bot simulation time and cache
+hits. Counters are totals; Prometheus turns them into rates, e.g.
+submissions per minute is
+    60 * rate(mathtracker_submitted_exercises_total[5m])
+
+Under gunicorn every worker process has its own copy of each metric, so a
+scrape would only see whichever worker answered. When PROMETHEUS_MULTIPROC_DIR
+is set (gunicorn.conf.py does it), prometheus_client keeps every process's
+values in mmap'd files in that directory instead, and /metrics adds up the
+files of all processes, including worker.py if it shares the directory. The
+variable must be set before prometheus_client is first imported.
+"""
+import hmac
+import os
+import time
+
+from flask import Response, abort, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+from querystats import current_queries
+
+
+REQUEST_LATENCY = Histogram(
+    'mathtracker_request_duration_seconds', 'Time to handle a request', ['method', 'endpoint'])
+REQUESTS = Counter(
+    'mathtracker_requests', 'Requests handled', ['method', 'endpoint', 'status'])
+REQUEST_QUERIES = Histogram(
+    'mathtracker_request_queries', 'SQL statements run by a request', ['endpoint'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+REQUEST_DB_TIME = Histogram(
+    'mathtracker_request_db_seconds', 'Time a request spent in the database', ['endpoint'])
+UPLOAD_SIZE = Histogram(
+    'mathtracker_upload_size_bytes', 'Size of uploaded solution files (the sum is the total bytes)',
+    buckets=(10_000, 100_000, 500_000, 1_000_000, 2_000_000, 5_000_000))
+SUBMITTED_EXERCISES = Counter(
+    'mathtracker_submitted_exercises', 'Exercises submitted, by upload or mark-done', ['source'])
+BOT_SIMULATION = Histogram(
+    'mathtracker_bot_simulation_seconds', 'Time to simulate the bots reacting to a batch of real submissions',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+CACHE_LOOKUPS = Counter(
+    'mathtracker_cache_lookups', 'Cache lookups (catalog snapshot, completion bitmaps)', ['cache', 'result'])
+
+
+def record_cache(cache, hit):
+    """Count one lookup of a cache as a hit or a miss."""
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def _registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app):
+    """Time every request and serve /metrics (behind METRICS_TOKEN when it is set)."""
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - started)
+        REQUESTS.labels(request.method, endpoint, str(response.status_code)).inc()
+        queries = current_queries()
+        REQUEST_QUERIES.labels(endpoint).observe(queries.count)
+        REQUEST_DB_TIME.labels(endpoint).observe(queries.seconds)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        token = app.config['METRICS_TOKEN']
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
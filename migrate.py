@@ -0,0 +1,48 @@
+"""
+Apply pending schema revisions (revisions.py) to the app database.
+
+The schema_version table records what has run, so this is safe to run on
+every deploy:
+    python migrate.py                 # apply everything pending
+    python migrate.py --dry-run       # print the plan, change nothing
+    python migrate.py --status        # current version and pending revisions
+    python migrate.py --target 12     # stop after revision 12
+    python migrate.py --stamp 22      # record revisions as applied without running them
+    python migrate.py --chunk-size 5000
+Backfills run in primary key chunks of --chunk-size rows, one commit each.
+"""
+import argparse
+
+from app import create_app
+from migrations import current_version, pending_revisions, upgrade, stamp
+from revisions import REVISIONS
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply pending schema revisions.')
+    parser.add_argument('--dry-run', action='store_true', help='Print the steps that would run')
+    parser.add_argument('--status', action='store_true', help='Show the current version and pending revisions')
+    parser.add_argument('--target', type=int, help='Highest revision to apply (default: all)')
+    parser.add_argument('--stamp', type=int, metavar='VERSION', help='Mark revisions up to VERSION as applied')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per backfill chunk (default 1000)')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        if args.status:
+            pending = pending_revisions(REVISIONS, args.target)
+            print(f"Schema version {current_version()}, latest {REVISIONS[-1].version}")
+            for revision in pending:
+                print(f"  pending {revision.version:03d} {revision.name}")
+        elif args.stamp is not None:
+            stamped = stamp(REVISIONS, args.stamp)
+            print(f"✓ Stamped {len(stamped)} revision(s); schema version is {current_version()}")
+        else:
+            applied = upgrade(REVISIONS, target=args.target, dry_run=args.dry_run, chunk_size=args.chunk_size)
+            if not applied:
+                print(f"✓ Schema is up to date (version {current_version()})")
+            elif args.dry_run:
+                print(f"\n{len(applied)} revision(s) pending; nothing was changed")
+            else:
+                print(f"\n✓ Applied {len(applied)} revision(s); schema version is {current_version()}")
@@ -0,0 +1,289 @@
+"""
+Versioned schema migrations.
+
+revisions.py lists every schema change in order; each revision's upgrade
+function describes its steps on an Operations object. The schema_version table
+records the revisions that have run, so `python migrate.py` applies only the
+pending ones, and `--dry-run` prints the plan without touching anything.
+
+Every step looks at the live schema before acting. A revision that failed
+halfway can therefore simply be re-run, and databases set up by the old
+one-off migrate_*.py scripts (no schema_version table) are brought up to date
+without errors:
+
+  - create_table: CREATE TABLE from the model, with its indexes
+  - alter_table: all column changes of one table as one batch: a single
+    ALTER TABLE on PostgreSQL; on SQLite, ADD COLUMNs, or one
+    copy-and-swap table rebuild when a column has to be dropped
+  - create_index / drop_index
+  - backfill: a data change applied over primary key ranges, committing each
+    chunk so writers are never blocked for long on a big table
+  - run: any other Python data step
+
+Each step commits on its own, and the version row is written once all steps
+of the revision have succeeded. Nothing here is SQLite- or PostgreSQL-only
+unless noted.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import ForeignKeyConstraint, Index, MetaData, Table, UniqueConstraint, func, inspect, select
+from sqlalchemy.schema import CreateColumn
+
+from models import db, SchemaVersion
+
+
+Revision = namedtuple('Revision', ['version', 'name', 'upgrade'])
+
+
+class Operations:
+    """The schema and data steps available to a revision's upgrade function."""
+
+    def __init__(self, dry_run=False, chunk_size=1000, log=print):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.log = log
+        self.planned_tables = {}  # Tables a dry run would have created so far, by name
+
+    # Introspection (always against the live database)
+
+    def _inspector(self):
+        return inspect(db.session.connection())
+
+    def has_table(self, name):
+        return name in self.planned_tables or self._inspector().has_table(name)
+
+    def columns(self, table_name):
+        if table_name in self.planned_tables:
+            return {column.name for column in self.planned_tables[table_name].columns}
+        if not self.has_table(table_name):
+            return set()
+        return {column['name'] for column in self._inspector().get_columns(table_name)}
+
+    def indexes(self, table_name):
+        if table_name in self.planned_tables:
+            return {index.name for index in self.planned_tables[table_name].indexes}
+        if not self.has_table(table_name):
+            return set()
+        return {index['name'] for index in self._inspector().get_indexes(table_name)}
+
+    def _apply(self, description, step):
+        """Run one step and commit it, or only print it on a dry run."""
+        if self.dry_run:
+            self.log(f"  → {description}")
+            return None
+        result = step(db.session.connection())
+        db.session.commit()
+        self.log(f"  ✓ {description}")
+        return result
+
+    def _skip(self, description):
+        self.log(f"  - {description}")
+
+    # Schema steps
+
+    def create_table(self, model):
+        """CREATE TABLE for a model (or Table) and its indexes, unless it exists."""
+        table = getattr(model, '__table__', model)
+        if self.has_table(table.name):
+            self._skip(f"table {table.name} already exists")
+            return
+        self._apply(f"create table {table.name}", lambda connection: table.create(connection))
+        if self.dry_run:
+            self.planned_tables[table.name] = table
+
+    def alter_table(self, model, add=(), drop=()):
+        """Add model columns and drop columns of one table in a single batch.
+
+        Added columns get the model's type for the connected database, and
+        existing rows are filled with the column's scalar default by a chunked
+        backfill (the models declare Python defaults, not server defaults).
+        """
+        table = model.__table__
+        existing = self.columns(table.name)
+        to_add = [table.c[name] for name in add if name not in existing]
+        to_drop = [name for name in drop if name in existing]
+        if not to_add and not to_drop:
+            self._skip(f"table {table.name} already has these column changes")
+            return
+
+        changes = [f"add {column.name}" for column in to_add] + [f"drop {name}" for name in to_drop]
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite' and to_drop:
+            self._apply(f"rebuild table {table.name}: {', '.join(changes)}",
+                        lambda connection: _rebuild_sqlite_table(connection, table.name, to_add, to_drop))
+        else:
+            self._apply(f"alter table {table.name}: {', '.join(changes)}",
+                        lambda connection: _alter_table(connection, table.name, to_add, to_drop))
+
+        for column in to_add:
+            if column.default is not None and column.default.is_scalar and table.c.get('id') is not None:
+                self.fill_default(table, column)
+
+    def create_index(self, index):
+        """CREATE INDEX for one of the models' Index objects, unless it exists."""
+        if index.name in self.indexes(index.table.name):
+            self._skip(f"index {index.name} already exists")
+            return
+        self._apply(f"create index {index.name}", lambda connection: index.create(connection))
+
+    def drop_index(self, name, table_name):
+        """DROP INDEX if the table has it."""
+        if name not in self.indexes(table_name):
+            self._skip(f"index {name} already dropped")
+            return
+        self._apply(f"drop index {name}", lambda connection: connection.exec_driver_sql(f'DROP INDEX {name}'))
+
+    # Data steps
+
+    def backfill(self, description, table, apply, key='id'):
+        """Run apply(start, end) for each chunk [start, end) of table.key, committing each.
+
+        `apply` changes the rows in its range and returns how many it changed.
+        Each chunk only holds its write locks until its own commit.
+        """
+        column = table.c[key]
+        if self.dry_run and table.name in self.planned_tables:
+            self.log(f"  → backfill {description} (new table {table.name})")
+            return
+        low, high = db.session.execute(select(func.min(column), func.max(column))).one()
+        if self.dry_run:
+            span = f"{table.name}.{key} {low}..{high}" if low is not None else f"empty {table.name}"
+            self.log(f"  → backfill {description} ({span}, {self.chunk_size} per chunk)")
+            return
+        changed = 0
+        if low is not None:
+            for start in range(low, high + 1, self.chunk_size):
+                changed += apply(start, start + self.chunk_size) or 0
+                db.session.commit()
+        self.log(f"  ✓ backfill {description}: {changed} row(s)")
+
+    def fill_default(self, table, column):
+        """Backfill NULLs in a column with its scalar default."""
+        def apply(start, end):
+            return db.session.execute(
+                table.update()
+                .where(column.is_(None), table.c.id >= start, table.c.id < end)
+                .values({column.name: column.default.arg})
+            ).rowcount
+        self.backfill(f"{table.name}.{column.name} = {column.default.arg!r}", table, apply)
+
+    def run(self, description, step):
+        """Run a Python data step; a returned string is appended to the log line."""
+        if self.dry_run:
+            self.log(f"  → {description}")
+            return
+        result = step()
+        db.session.commit()
+        self.log(f"  ✓ {description}" + (f": {result}" if isinstance(result, str) else ''))
+
+
+def _column_ddl(connection, column):
+    return str(CreateColumn(column).compile(dialect=connection.dialect))
+
+
+def _alter_table(connection, table_name, to_add, to_drop):
+    """Column changes of one table: one ALTER TABLE on PostgreSQL, one per column on SQLite."""
+    clauses = [f'ADD COLUMN {_column_ddl(connection, column)}' for column in to_add]
+    clauses += [f'DROP COLUMN {name}' for name in to_drop]
+    if connection.dialect.name == 'sqlite':
+        # SQLite takes one change per ALTER TABLE; adding a column only touches the schema
+        for clause in clauses:
+            connection.exec_driver_sql(f'ALTER TABLE {table_name} {clause}')
+    else:
+        connection.exec_driver_sql(f'ALTER TABLE {table_name} ' + ', '.join(clauses))
+
+
+def _rebuild_sqlite_table(connection, table_name, to_add, to_drop):
+    """Apply all column changes of a SQLite table with one copy-and-swap rebuild.
+
+    The current table is reflected, a new table is created with the dropped
+    columns left out and the added ones appended, the rows are copied over in
+    one INSERT ... SELECT, and the new table takes the old one's name and
+    indexes. SQLite's ALTER TABLE can't drop indexed or constrained columns
+    (or any column before 3.35), and doing every change in a single rebuild
+    copies the table once.
+    """
+    metadata = MetaData()
+    old = Table(table_name, metadata, autoload_with=connection)
+    kept = [column for column in old.columns if column.name not in to_drop]
+    constraints = []
+    for constraint in old.constraints:
+        names = [column.name for column in constraint.columns]
+        if set(names) & set(to_drop):
+            continue
+        if isinstance(constraint, UniqueConstraint):
+            constraints.append(UniqueConstraint(*names, name=constraint.name))
+        elif isinstance(constraint, ForeignKeyConstraint):
+            # The referenced tables were reflected into the same metadata along with the old table
+            constraints.append(ForeignKeyConstraint(names, [element.target_fullname for element in constraint.elements],
+                                                    name=constraint.name))
+    indexes = [
+        (index.name, [column.name for column in index.columns], index.unique)
+        for index in old.indexes
+        if not {column.name for column in index.columns} & set(to_drop)
+    ]
+    new = Table(f'_{table_name}_new', metadata,
+                *[column._copy() for column in kept], *[column._copy() for column in to_add], *constraints)
+    new.create(connection)
+
+    names = ', '.join(column.name for column in kept)
+    connection.exec_driver_sql(f'INSERT INTO {new.name} ({names}) SELECT {names} FROM {table_name}')
+    connection.exec_driver_sql(f'DROP TABLE {table_name}')
+    connection.exec_driver_sql(f'ALTER TABLE {new.name} RENAME TO {table_name}')
+
+    renamed = Table(table_name, MetaData(), autoload_with=connection)
+    for name, columns, unique in indexes:
+        Index(name, *[renamed.c[column] for column in columns], unique=unique).create(connection)
+
+
+def check_revisions(revisions):
+    """Versions must be unique and in increasing order."""
+    versions = [revision.version for revision in revisions]
+    if versions != sorted(set(versions)):
+        raise ValueError(f'Revision versions must be unique and increasing: {versions}')
+
+
+def current_version():
+    """Highest applied revision (0 before the first one, or without a schema_version table)."""
+    if not inspect(db.session.connection()).has_table(SchemaVersion.__tablename__):
+        return 0
+    return db.session.query(func.max(SchemaVersion.version)).scalar() or 0
+
+
+def pending_revisions(revisions, target=None):
+    """Revisions above the current version, up to `target` (default: all)."""
+    check_revisions(revisions)
+    current = current_version()
+    return [revision for revision in revisions
+            if revision.version > current and (target is None or revision.version <= target)]
+
+
+def upgrade(revisions, target=None, dry_run=False, chunk_size=1000, log=print):
+    """Apply (or with dry_run, describe) every pending revision in order; returns them."""
+    pending = pending_revisions(revisions, target)
+    if not dry_run:
+        SchemaVersion.__table__.create(db.session.connection(), checkfirst=True)
+        db.session.commit()
+
+    operations = Operations(dry_run=dry_run, chunk_size=chunk_size, log=log)
+    for revision in pending:
+        log(f"{revision.version:03d} {revision.name}")
+        revision.upgrade(operations)
+        if not dry_run:
+            db.session.add(SchemaVersion(version=revision.version, name=revision.name,
+                                         applied_at=datetime.utcnow()))
+            db.session.commit()
+    return pending
+
+
+def stamp(revisions, version):
+    """Record revisions up to `version` as applied without running them (e.g. after create_all)."""
+    check_revisions(revisions)
+    SchemaVersion.__table__.create(db.session.connection(), checkfirst=True)
+    applied = {row[0] for row in db.session.query(SchemaVersion.version)}
+    stamped = [revision for revision in revisions if revision.version <= version and revision.version not in applied]
+    for revision in stamped:
+        db.session.add(SchemaVersion(version=revision.version, name=revision.name, applied_at=datetime.utcnow()))
+    db.session.commit()
+    return stamped
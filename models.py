@@ -3,7 +3,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from scoring import exercise_points
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(UserMixin, db.Model):
@@ -19,6 +22,7 @@ class User(UserMixin, db.Model):
     last_login = db.Column(db.DateTime)
     streak_days = db.Column(db.Integer, default=0)
     longest_streak = db.Column(db.Integer, default=0)
+    last_active_date = db.Column(db.Date, index=True)  # Last day with a completed exercise, for streaks
     total_points = db.Column(db.Integer, default=0)  # Total points earned from completing exercises
     nickname_changed_at = db.Column(db.DateTime)  # Track when nickname was last changed
     
@@ -86,33 +90,49 @@ class User(UserMixin, db.Model):
         return int((completed / total_exercises) * 100) if total_exercises > 0 else 0
     
     def update_streak(self, submission_date=None):
-        """Update user's streak based on submissions."""
+        """Update user's streak for activity on `submission_date` (default today).
+        
+        Only the stored last_active_date and current streak are needed: another
+        day in a row extends the streak, a gap restarts it at 1.
+        """
         if submission_date is None:
             submission_date = date.today()
         
-        # Get activity logs sorted by date descending
-        logs = ActivityLog.query.filter_by(user_id=self.id)\
-            .order_by(ActivityLog.date.desc()).all()
-        
-        if not logs:
+        last_active = self.last_active_date
+        if last_active and last_active >= submission_date:
+            # Already counted this day (or an older one arrived late)
+            if last_active == submission_date and not self.streak_days:
+                self.streak_days = 1
+        elif last_active and (submission_date - last_active).days == 1:
+            self.streak_days = (self.streak_days or 0) + 1
+        else:
             self.streak_days = 1
-            self.longest_streak = max(self.longest_streak, 1)
-            return
         
-        # Calculate current streak
-        current_streak = 0
-        today = date.today()
-        expected_date = today
+        if not last_active or submission_date > last_active:
+            self.last_active_date = submission_date
+        self.longest_streak = max(self.longest_streak or 0, self.streak_days)
+    
+    def add_points(self, points):
+        """Add (or, if negative, remove) points in one atomic UPDATE, never going below zero.
         
-        for log in logs:
-            if log.date == expected_date:
-                current_streak += 1
-                expected_date = date.fromordinal(expected_date.toordinal() - 1)
-            else:
-                break
+        The database does the arithmetic, so concurrent submissions can't
+        overwrite each other's totals; total_points is reloaded on next access.
+        """
+        total = db.func.coalesce(User.total_points, 0) + points
+        User.query.filter_by(id=self.id).update(
+            {User.total_points: db.case((total > 0, total), else_=0)},
+            synchronize_session=False
+        )
+        db.session.expire(self, ['total_points'])
+    
+    def lock_for_update(self):
+        """Lock this user's row until commit and reload it.
         
-        self.streak_days = current_streak
-        self.longest_streak = max(self.longest_streak, current_streak)
+        Write routes call this first so one user's concurrent requests queue
+        up instead of taking row locks in different orders and deadlocking on
+        PostgreSQL (SELECT ... FOR UPDATE; SQLite already has one writer).
+        """
+        User.query.filter_by(id=self.id).populate_existing().with_for_update().one()
     
     def get_companion_emoji(self):
         """Get companion emoji based on companion_id."""
@@ -192,19 +212,28 @@ class Exercise(db.Model):
     __tablename__ = 'exercises'
     
     id = db.Column(db.Integer, primary_key=True)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id'), nullable=False, index=True)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id'), nullable=False)
     section = db.Column(db.Integer)  # Section number within the chapter (e.g., 1, 2, 3 for §1, §2, §3)
     number = db.Column(db.Integer, nullable=False)
     difficulty = db.Column(db.String(20))  # 'easy', 'medium', 'hard'
     points = db.Column(db.Integer, default=0)  # Points awarded for completing this exercise
     
+    # Chapter/section/number lookups are answered from the index (the id is the rowid)
+    __table_args__ = (db.Index('ix_exercises_chapter_section_number', 'chapter_id', 'section', 'number'),)
+    
     # Relationships
     submissions = db.relationship('Submission', backref='exercise', lazy='dynamic', 
                                  cascade='all, delete-orphan')
     
     def is_completed_by(self, user_id):
-        """Check if this exercise has been completed by a user."""
-        return Submission.query.filter_by(user_id=user_id, exercise_id=self.id).first() is not None
+        """Check if this exercise has been completed by a user (a bit test on their book bitset)."""
+        from catalog import get_catalog
+        from completions import get_completion_bits
+        
+        exercise = get_catalog().exercises.get(self.id)
+        if exercise is None:
+            return Submission.query.filter_by(user_id=user_id, exercise_id=self.id).first() is not None
+        return bool(get_completion_bits(user_id, exercise.book_id) >> exercise.bit & 1)
     
     def get_display_number(self):
         """Get the display number in format chapter.section.exercise (e.g., 1.2.3)."""
@@ -213,37 +242,14 @@ class Exercise(db.Model):
         return f"{self.chapter.number}.{self.number}"
     
     def calculate_points(self, is_last_in_section=False, is_section_complete=False, is_chapter_complete=False):
-        """Calculate points for this exercise based on difficulty, bonuses, and chapter multiplier.
-        Each chapter increases points by 5% (1.0, 1.05, 1.10, 1.15, etc.)"""
-        # Base points by difficulty
-        base_points = {
-            'easy': 10,
-            'medium': 20,
-            'hard': 30
-        }.get(self.difficulty, 10)
-        
-        # Chapter multiplier: 5% increase per chapter (Chapter 1 = 1.0, Chapter 2 = 1.05, etc.)
-        chapter_number = self.chapter.number
-        chapter_multiplier = 1 + (0.05 * (chapter_number - 1))
-        
-        total_points = base_points
-        
-        # Last exercise in section bonus
-        if is_last_in_section:
-            total_points += 15
+        """Points for this exercise with the given bonuses, from the catalog's precomputed table."""
+        from catalog import get_catalog
         
-        # Section completion bonus
-        if is_section_complete:
-            total_points += 50
-        
-        # Chapter completion bonus
-        if is_chapter_complete:
-            total_points += 100
-        
-        # Apply chapter multiplier and round to nearest integer
-        total_points = int(round(total_points * chapter_multiplier))
-        
-        return total_points
+        exercise = get_catalog().exercises.get(self.id)
+        if exercise is None:
+            return exercise_points(self.difficulty, self.chapter.number, is_last_in_section,
+                                   is_section_complete, is_chapter_complete)
+        return exercise.calculate_points(is_last_in_section, is_section_complete, is_chapter_complete)
     
     def __repr__(self):
         if self.section:
@@ -256,17 +262,33 @@ class Submission(db.Model):
     __tablename__ = 'submissions'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
-    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     status = db.Column(db.String(20), default='submitted')
     points_earned = db.Column(db.Integer, default=0)  # Points earned for this submission
     
+    # A user completes an exercise once; the composites also serve the single-column lookups
+    __table_args__ = (
+        db.Index('ix_submissions_user_exercise', 'user_id', 'exercise_id', unique=True),
+        db.Index('ix_submissions_user_created', 'user_id', 'created_at'),
+        db.Index('ix_submissions_exercise_user', 'exercise_id', 'user_id'),
+    )
+    
     def __repr__(self):
         return f'<Submission {self.id} by User {self.user_id}>'
 
 
+# Target exercises of each weekly plan
+weekly_plan_exercises = db.Table(
+    'weekly_plan_exercises',
+    db.Column('plan_id', db.Integer, db.ForeignKey('weekly_plans.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('exercise_id', db.Integer, db.ForeignKey('exercises.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_weekly_plan_exercises_exercise_plan', 'exercise_id', 'plan_id')
+)
+
+
 class WeeklyPlan(db.Model):
     """Weekly plan model for goal setting."""
     __tablename__ = 'weekly_plans'
@@ -280,60 +302,51 @@ class WeeklyPlan(db.Model):
     deadline_time = db.Column(db.String(5), nullable=True)  # Format: "HH:MM"
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
-    target_exercises = db.Column(db.Text)  # JSON string of exercise IDs or text description
     custom_text = db.Column(db.Text)  # User's custom exercise description
     completed = db.Column(db.Boolean, default=False)
     auto_renew = db.Column(db.Boolean, default=True)  # Auto-create next week's plan
     
+    # Exercises this plan targets (empty for own-pace plans)
+    target_exercises = db.relationship('Exercise', secondary=weekly_plan_exercises, order_by='Exercise.id')
+    
+    @classmethod
+    def count_progress(cls, plan_ids):
+        """Map each plan id to (completed, target) exercise counts in one GROUP BY query."""
+        counts = dict.fromkeys(plan_ids, (0, 0))
+        if not counts:
+            return counts
+        
+        rows = db.session.query(
+            weekly_plan_exercises.c.plan_id,
+            db.func.count(db.distinct(Submission.exercise_id)),
+            db.func.count(db.distinct(weekly_plan_exercises.c.exercise_id))
+        ).join(cls, cls.id == weekly_plan_exercises.c.plan_id)\
+            .outerjoin(Submission, (Submission.exercise_id == weekly_plan_exercises.c.exercise_id)
+                       & (Submission.user_id == cls.user_id))\
+            .filter(weekly_plan_exercises.c.plan_id.in_(list(counts)))\
+            .group_by(weekly_plan_exercises.c.plan_id).all()
+        for plan_id, completed, target in rows:
+            counts[plan_id] = (completed, target)
+        return counts
+    
+    def _get_counts(self):
+        """(completed, target) exercise counts for this plan."""
+        return self.count_progress([self.id])[self.id]
+    
     def get_progress(self):
         """Calculate progress percentage for this plan."""
-        import json
-        
-        if not self.target_exercises:
+        completed_count, target_count = self._get_counts()
+        if not target_count:
             return 0
-        
-        try:
-            target_ids = json.loads(self.target_exercises)
-        except:
-            return 0
-        
-        if not target_ids:
-            return 0
-        
-        completed_count = db.session.query(db.func.count(db.distinct(Submission.exercise_id)))\
-            .filter(Submission.user_id == self.user_id, 
-                   Submission.exercise_id.in_(target_ids)).scalar() or 0
-        
-        return int((completed_count / len(target_ids)) * 100)
+        return int((completed_count / target_count) * 100)
     
     def get_completed_count(self):
         """Get number of exercises completed in this plan."""
-        import json
-        
-        if not self.target_exercises:
-            return 0
-        
-        try:
-            target_ids = json.loads(self.target_exercises)
-        except:
-            return 0
-        
-        return db.session.query(db.func.count(db.distinct(Submission.exercise_id)))\
-            .filter(Submission.user_id == self.user_id, 
-                   Submission.exercise_id.in_(target_ids)).scalar() or 0
+        return self._get_counts()[0]
     
     def get_target_count(self):
         """Get total number of target exercises."""
-        import json
-        
-        if not self.target_exercises:
-            return 0
-        
-        try:
-            target_ids = json.loads(self.target_exercises)
-            return len(target_ids)
-        except:
-            return 0
+        return self._get_counts()[1]
     
     def get_book_progress(self):
         """Calculate overall book completion percentage for this plan's book."""
@@ -507,6 +520,58 @@ class ActivityLog(db.Model):
         return f'<ActivityLog User {self.user_id} on {self.date}>'
 
 
+class ActivityRollup(db.Model):
+    """Daily exercise and point totals per user and book, for period statistics."""
+    __tablename__ = 'activity_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False, index=True)
+    category = db.Column(db.String(50))  # Copy of books.category so filters need no join
+    exercises = db.Column(db.Integer, default=0, nullable=False)
+    points = db.Column(db.Integer, default=0, nullable=False)
+    
+    # One row per user per book per day
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', 'book_id', name='_user_date_book_uc'),
+        db.Index('ix_activity_rollups_category_date', 'category', 'date'),
+    )
+    
+    def __repr__(self):
+        return f'<ActivityRollup User {self.user_id} Book {self.book_id} on {self.date}>'
+
+
+class LeaderboardEntry(db.Model):
+    """Materialized leaderboard totals, one row per user, kept in step with submissions."""
+    __tablename__ = 'leaderboard_entries'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_exercises = db.Column(db.Integer, default=0, nullable=False, index=True)
+    total_points = db.Column(db.Integer, default=0, nullable=False, index=True)
+    
+    # Period counters are only valid while their *_start matches the current period
+    week_start = db.Column(db.Date)
+    week_exercises = db.Column(db.Integer, default=0, nullable=False)
+    month_start = db.Column(db.Date)
+    month_exercises = db.Column(db.Integer, default=0, nullable=False)
+    year_start = db.Column(db.Date)
+    year_exercises = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_leaderboard_week', 'week_start', 'week_exercises'),
+        db.Index('ix_leaderboard_month', 'month_start', 'month_exercises'),
+        db.Index('ix_leaderboard_year', 'year_start', 'year_exercises'),
+    )
+    
+    # Relationship
+    user = db.relationship('User', backref=db.backref('leaderboard_entry', uselist=False,
+                                                      cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<LeaderboardEntry User {self.user_id}>'
+
+
 class ReadingSection(db.Model):
     """Model for tracking completion of reading-only sections (sections with 0 exercises)."""
     __tablename__ = 'reading_sections'
@@ -529,6 +594,57 @@ class ReadingSection(db.Model):
         return f'<ReadingSection User {self.user_id} Chapter {self.chapter_id} Section {self.section}>'
 
 
+class Job(db.Model):
+    """Background job queue entry, processed by worker.py."""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. 'real_submission'
+    payload = db.Column(db.Text)  # JSON-encoded arguments
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = db.Column(db.DateTime)  # Lease of a running job; reclaimed once it has passed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    # Workers poll for pending jobs that are due
+    __table_args__ = (db.Index('ix_jobs_status_run_after', 'status', 'run_after'),)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} ({self.status})>'
+
+
+class CompletionBitmap(db.Model):
+    """Which exercises of a book a user has completed, as a bitset (see completions.py).
+    
+    Bit i stands for the i-th exercise of the book in catalog order, so rows are
+    only valid for the catalog version they were built against.
+    """
+    __tablename__ = 'completion_bitmaps'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id', ondelete='CASCADE'), primary_key=True)
+    catalog_version = db.Column(db.Integer, nullable=False)
+    bits = db.Column(db.LargeBinary, nullable=False)  # little-endian integer
+    
+    def __repr__(self):
+        return f'<CompletionBitmap user {self.user_id} book {self.book_id}>'
+
+
+class CatalogVersion(db.Model):
+    """Single-row counter bumped whenever books, chapters or exercises change (see catalog.py)."""
+    __tablename__ = 'catalog_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>'
+
+
 class BookRequest(db.Model):
     """Book request model for users to suggest new books."""
     __tablename__ = 'book_requests'
@@ -546,3 +662,53 @@ class BookRequest(db.Model):
     
     def __repr__(self):
         return f'<BookRequest {self.book_title} by User {self.user_id}>'
+
+
+class UserBadge(db.Model):
+    """A badge awarded to a user (rules live in badges.py)."""
+    __tablename__ = 'user_badges'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    badge_key = db.Column(db.String(50), primary_key=True)
+    awarded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<UserBadge {self.badge_key} for User {self.user_id}>'
+
+
+class PointsEvent(db.Model):
+    """One change to a user's points; users.total_points is their running sum (see ledger.py).
+    
+    Rows are only ever appended: taking points away is a new negative event.
+    """
+    __tablename__ = 'points_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'submission', 'reading', 'bonus', 'reversal', 'plan_reset'
+    points = db.Column(db.Integer, nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id', ondelete='SET NULL'))
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id', ondelete='SET NULL'))
+    section = db.Column(db.Integer)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_points_events_user_created', 'user_id', 'created_at'),
+        db.Index('ix_points_events_created_user', 'created_at', 'user_id'),
+    )
+    
+    def __repr__(self):
+        return f'<PointsEvent {self.kind} {self.points:+d} for User {self.user_id}>'
+
+
+class SchemaVersion(db.Model):
+    """A schema revision that has been applied (see migrations.py and revisions.py)."""
+    __tablename__ = 'schema_version'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchemaVersion {self.version} {self.name}>'
@@ -0,0 +1,64 @@
+"""
+Batched progress numbers for weekly plan cards.
+
+The dashboard and weekly plan pages show chapter progress, completed/target
+counts and overall book progress for every plan. PlanProgressService computes
+all of them up front with three queries, however many plans there are, and the
+templates read the resulting dict instead of calling WeeklyPlan methods.
+"""
+from sqlalchemy import func
+
+from models import db, Chapter, Exercise, Submission, WeeklyPlan
+
+
+class PlanProgressService:
+    """Precompute progress for a list of plans.
+
+    Usage:
+        plan_progress = PlanProgressService(plans).compute()
+        plan_progress[plan.id]['progress']  # also 'completed', 'target', 'book_progress'
+    """
+
+    def __init__(self, plans):
+        self.plans = list(plans)
+
+    def _book_totals(self, book_ids):
+        """Number of exercises in each book."""
+        rows = db.session.query(Chapter.book_id, func.count(Exercise.id))\
+            .join(Exercise, Exercise.chapter_id == Chapter.id)\
+            .filter(Chapter.book_id.in_(book_ids))\
+            .group_by(Chapter.book_id).all()
+        return dict(rows)
+
+    def _book_completions(self, user_ids, book_ids):
+        """Number of distinct exercises each user has completed in each book."""
+        rows = db.session.query(Submission.user_id, Chapter.book_id, func.count(func.distinct(Submission.exercise_id)))\
+            .join(Exercise, Submission.exercise_id == Exercise.id)\
+            .join(Chapter, Exercise.chapter_id == Chapter.id)\
+            .filter(Submission.user_id.in_(user_ids), Chapter.book_id.in_(book_ids))\
+            .group_by(Submission.user_id, Chapter.book_id).all()
+        return {(user_id, book_id): completed for user_id, book_id, completed in rows}
+
+    def compute(self):
+        """Return {plan_id: {'progress', 'completed', 'target', 'book_progress'}}."""
+        if not self.plans:
+            return {}
+
+        book_ids = {plan.book_id for plan in self.plans}
+        user_ids = {plan.user_id for plan in self.plans}
+        counts = WeeklyPlan.count_progress([plan.id for plan in self.plans])
+        book_totals = self._book_totals(book_ids)
+        book_completions = self._book_completions(user_ids, book_ids)
+
+        progress = {}
+        for plan in self.plans:
+            completed, target = counts[plan.id]
+            book_total = book_totals.get(plan.book_id, 0)
+            book_completed = book_completions.get((plan.user_id, plan.book_id), 0)
+            progress[plan.id] = {
+                'progress': int((completed / target) * 100) if target else 0,
+                'completed': completed,
+                'target': target,
+                'book_progress': int((book_completed / book_total) * 100) if book_total else 0
+            }
+        return progress
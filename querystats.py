@@ -0,0 +1,133 @@
+"""
+Per-request SQL instrumentation.
+
+init_query_stats() hooks before_cursor_execute/after_cursor_execute on every
+engine of the app (primary and replicas) and, inside a request, counts the
+statements and the time spent in the database. It also groups statements by
+shape: the SQL text with its IN (...) lists collapsed, since SQLAlchemy
+already sends values as bound parameters. A shape that runs
+N_PLUS_ONE_THRESHOLD times or more in one request is reported as a
+suspected N+1, the usual sign of a per-row query in a loop.
+
+Output goes to the "querystats" logger as one JSON object per line:
+  - slow_query: any statement over SLOW_QUERY_MS, with its route (also for
+    statements outside requests, e.g. in the worker)
+  - n_plus_one: each suspected shape at the end of a request
+  - request: the request's totals (not in debug mode, where they go into
+    X-Query-Count, X-Query-Time-Ms and X-Query-N-Plus-One response headers
+    instead)
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+
+logger = logging.getLogger('querystats')
+
+# "(?, ?, ?)" or "(%(id_1_1)s, %(id_1_2)s)" from an expanded IN list
+_PARAMETER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RequestQueries:
+    """Statement count, database time and statement shapes of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def suspected_n_plus_one(self, threshold):
+        """(shape, count) of every shape run at least `threshold` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def statement_shape(statement):
+    """The statement with whitespace normalized and IN lists of any length made equal."""
+    return _PARAMETER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def current_queries():
+    """The current request's RequestQueries (None outside a request)."""
+    if not has_request_context():
+        return None
+    if 'queries' not in g:
+        g.queries = RequestQueries()
+    return g.queries
+
+
+def _route():
+    if not has_request_context():
+        return None
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f'{request.method} {rule}'
+
+
+def _log(level, event_name, **fields):
+    logger.log(level, json.dumps({'event': event_name, **fields}, default=str))
+
+
+def _configure_logger():
+    """Log to stderr, one JSON object per line, unless logging was configured elsewhere."""
+    if logger.handlers or logging.getLogger().handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def init_query_stats(app):
+    """Instrument the app's engines and report each request's queries."""
+    _configure_logger()
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    slow_ms = app.config['SLOW_QUERY_MS']
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        queries = current_queries()
+        if queries is not None:
+            queries.add(statement, seconds)
+        if slow_ms is not None and seconds * 1000 >= slow_ms:
+            _log(logging.WARNING, 'slow_query', route=_route(), ms=round(seconds * 1000, 1),
+                 statement=statement_shape(statement)[:500])
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.after_request
+    def report_queries(response):
+        queries = current_queries()
+        suspects = queries.suspected_n_plus_one(app.config['N_PLUS_ONE_THRESHOLD'])
+        for shape, count in suspects:
+            _log(logging.WARNING, 'n_plus_one', route=_route(), count=count, statement=shape[:500])
+
+        db_ms = round(queries.seconds * 1000, 1)
+        if app.debug or app.config['QUERY_STATS_HEADERS']:
+            response.headers['X-Query-Count'] = str(queries.count)
+            response.headers['X-Query-Time-Ms'] = str(db_ms)
+            response.headers['X-Query-N-Plus-One'] = str(len(suspects))
+        if not app.debug and app.config['QUERY_STATS_LOG']:
+            _log(logging.INFO, 'request', route=_route(), endpoint=request.endpoint, status=response.status_code,
+                 queries=queries.count, db_ms=db_ms, n_plus_one=len(suspects))
+        return response
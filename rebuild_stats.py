@@ -0,0 +1,40 @@
+"""
+Rebuild the derived statistics tables from the submissions table.
+
+activity_rollups and leaderboard_entries are kept up to date by the
+submission routes; run this after they drift (e.g. after editing submissions
+by hand) or to fill them on a database that has just been migrated:
+    python rebuild_stats.py                 # both
+    python rebuild_stats.py --rollups       # daily activity rollups only
+    python rebuild_stats.py --leaderboard   # leaderboard entries only
+Every row is recomputed from scratch, so it is safe to re-run at any time.
+"""
+import argparse
+
+from app import create_app
+from models import db
+from rollups import rebuild_rollups
+from leaderboard import rebuild_entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild activity rollups and leaderboard entries.')
+    parser.add_argument('--rollups', action='store_true', help='Rebuild the daily activity rollups')
+    parser.add_argument('--leaderboard', action='store_true', help='Rebuild the leaderboard entries')
+    args = parser.parse_args()
+    if not args.rollups and not args.leaderboard:
+        args.rollups = args.leaderboard = True
+    
+    app = create_app()
+    
+    with app.app_context():
+        if args.rollups:
+            print("Rebuilding daily activity rollups from submissions...")
+            row_count = rebuild_rollups()
+            db.session.commit()
+            print(f"✓ Wrote {row_count} rollup rows")
+        if args.leaderboard:
+            print("Rebuilding leaderboard entries from submissions...")
+            user_count = rebuild_entries()
+            db.session.commit()
+            print(f"✓ Rebuilt entries for {user_count} users")
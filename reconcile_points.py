@@ -0,0 +1,37 @@
+"""
+Batch job: check every user's total_points against the points ledger.
+
+users.total_points is a running sum of points_events (see ledger.py). This
+recomputes the sums for all users in one GROUP BY and reports any drift; with
+--fix it also rewrites the totals (and leaderboard points) from the ledger:
+    python reconcile_points.py [--fix]
+"""
+import argparse
+
+from app import create_app
+from models import db, User
+from ledger import reconcile
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare users.total_points with the points ledger.')
+    parser.add_argument('--fix', action='store_true', help='Set drifted totals to the ledger sum')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        drift = reconcile(fix=args.fix)
+        db.session.commit()
+        
+        if not drift:
+            print("✓ Every user's total_points matches the ledger")
+        else:
+            usernames = dict(db.session.query(User.id, User.username)
+                             .filter(User.id.in_([user_id for user_id, _, _ in drift])))
+            for user_id, total, ledger_sum in drift:
+                print(f"  {usernames.get(user_id, user_id)}: total_points {total}, ledger {ledger_sum} ({ledger_sum - total:+d})")
+            if args.fix:
+                print(f"✓ Fixed {len(drift)} user(s)")
+            else:
+                print(f"✗ {len(drift)} user(s) drifted; run with --fix to correct them")
@@ -0,0 +1,33 @@
+"""
+Nightly job: reset the streaks of users who missed a day.
+
+update_streak() only runs when a user submits, so a user who stops submitting
+would keep their old streak forever. Run this once a day (e.g. from cron just
+after midnight):
+    python reset_streaks.py
+"""
+from datetime import date, timedelta
+
+from app import create_app
+from models import db, User
+
+
+def reset_broken_streaks(today=None):
+    """Zero every streak whose last active day is before yesterday, in one UPDATE."""
+    if today is None:
+        today = date.today()
+    yesterday = today - timedelta(days=1)
+    
+    return User.query.filter(
+        User.streak_days != 0,
+        (User.last_active_date < yesterday) | (User.last_active_date == None)
+    ).update({User.streak_days: 0}, synchronize_session=False)
+
+
+if __name__ == '__main__':
+    app = create_app()
+    
+    with app.app_context():
+        reset_count = reset_broken_streaks()
+        db.session.commit()
+        print(f"✓ Reset {reset_count} broken streak(s)")
@@ -0,0 +1,313 @@
+"""
+The schema history, oldest first (run with `python migrate.py`; see migrations.py).
+
+Each revision replaces one of the old migrate_*.py scripts and describes its
+change as steps on an Operations object. Never edit or renumber a revision
+that has shipped; add a new one at the end. Steps are idempotent so
+databases migrated by the old scripts can run the whole list.
+"""
+import json
+import random
+
+from sqlalchemy import and_, exists, func, insert, literal, or_, select
+
+from models import (db, User, Book, Chapter, Exercise, Submission, WeeklyPlan, ActivityLog, ActivityRollup,
+                    LeaderboardEntry, ReadingSection, Job, CatalogVersion, CompletionBitmap, BookRequest, UserBadge,
+                    PointsEvent, weekly_plan_exercises)
+from migrations import Revision
+
+
+REVISIONS = []
+
+
+def revision(version):
+    """Register an upgrade function as the next revision, named after the function."""
+    def register(upgrade):
+        REVISIONS.append(Revision(version, upgrade.__name__, upgrade))
+        return upgrade
+    return register
+
+
+def model_index(model, name):
+    """One of the Index objects declared on a model."""
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+
+def assign_randomly(op, description, column, choices, missing):
+    """Backfill users matching `missing` with a random choice, one chunk of ids at a time."""
+    table = User.__table__
+
+    def apply(start, end):
+        ids = [row[0] for row in db.session.query(User.id).filter(missing, User.id >= start, User.id < end)]
+        if ids:
+            db.session.execute(table.update().where(table.c.id == db.bindparam('user_id'))
+                               .values({column.name: db.bindparam('value')}),
+                               [{'user_id': user_id, 'value': random.choice(choices)} for user_id in ids])
+        return len(ids)
+
+    op.backfill(description, table, apply)
+
+
+@revision(1)
+def initial_schema(op):
+    """Users, books, chapters, exercises, submissions, weekly plans and the activity log."""
+    for model in (User, Book, Chapter, Exercise, Submission, WeeklyPlan, ActivityLog):
+        op.create_table(model)
+
+
+@revision(2)
+def weekly_plan_modes(op):
+    """Plan modes, deadlines, custom text and auto-renew on weekly plans."""
+    op.alter_table(WeeklyPlan, add=['plan_mode', 'current_chapter_number', 'deadline_time', 'custom_text',
+                                    'auto_renew'])
+
+
+@revision(3)
+def points_system(op):
+    """Exercise points, users' total points and points earned per submission."""
+    op.alter_table(Exercise, add=['points'])
+    op.alter_table(User, add=['total_points'])
+    op.alter_table(Submission, add=['points_earned'])
+
+
+@revision(4)
+def reading_sections(op):
+    """Completions of reading-only sections."""
+    op.create_table(ReadingSection)
+
+
+@revision(5)
+def companions(op):
+    """A study companion for every user, with an optional name."""
+    op.alter_table(User, add=['companion_id', 'companion_name'])
+    assign_randomly(op, "random companion for users without one", User.__table__.c.companion_id, [1, 2, 3, 4, 5],
+                    or_(User.companion_id.is_(None), User.companion_id < 1, User.companion_id > 5))
+
+
+@revision(6)
+def teams(op):
+    """Red, blue and green teams."""
+    op.alter_table(User, add=['team'])
+    assign_randomly(op, "random team for users without one", User.__table__.c.team, ['red', 'blue', 'green'],
+                    or_(User.team.is_(None), User.team == ''))
+
+
+@revision(7)
+def nicknames(op):
+    """Display nicknames and the dashboard leaderboard preference."""
+    op.alter_table(User, add=['nickname', 'nickname_changed_at', 'show_leaderboard'])
+
+
+@revision(8)
+def privacy_settings(op):
+    """Which parts of a profile other users can see."""
+    op.alter_table(User, add=['public_profile', 'public_stats', 'public_uploads', 'public_activity'])
+
+
+@revision(9)
+def fake_users(op):
+    """Bot users and how competitive they are; marks the original hand-made bots."""
+    op.alter_table(User, add=['is_fake', 'competitiveness'])
+
+    def mark_original_bots():
+        usernames = ['alex_math', 'bella_student', 'carlos_genius', 'diana_solver', 'ethan_pro', 'fiona_ace',
+                     'george_keen', 'hannah_smart', 'isaac_brain', 'julia_whiz', 'kevin_master', 'lily_legend',
+                     'marcus_ninja', 'nina_star', 'oliver_champ']
+        # 5 high (0.7-0.9), 3 low (0.1-0.3) and the rest medium (0.4-0.6) competitors
+        shuffled = random.sample(usernames, len(usernames))
+        tiers = {name: (0.7, 0.9) for name in shuffled[:5]}
+        tiers.update({name: (0.1, 0.3) for name in shuffled[5:8]})
+        # Column-level statements: User rows can't be loaded before later revisions add their columns
+        bots = db.session.query(User.id, User.username)\
+            .filter(User.username.in_(usernames), or_(User.is_fake.is_(None), User.is_fake == False)).all()
+        for user_id, username in bots:
+            User.query.filter_by(id=user_id).update({
+                User.is_fake: True,
+                User.competitiveness: random.uniform(*tiers.get(username, (0.4, 0.6)))
+            }, synchronize_session=False)
+        return f"{len(bots)} marked"
+
+    op.run("mark the original bot accounts as fake", mark_original_bots)
+
+
+@revision(10)
+def book_category_and_topic(op):
+    """Book categories (leaderboard filter) and topics."""
+    op.alter_table(Book, add=['category', 'topic'])
+
+
+@revision(11)
+def book_requests(op):
+    """Users' suggestions for new books."""
+    op.create_table(BookRequest)
+
+
+@revision(12)
+def leaderboard_entries(op):
+    """Materialized leaderboard rows, built from submissions by rebuild_stats.py."""
+    op.create_table(LeaderboardEntry)
+    op.log("  ! fill it with: python rebuild_stats.py --leaderboard")
+
+
+@revision(13)
+def activity_rollups(op):
+    """Daily per-book activity rollups, built from submissions by rebuild_stats.py."""
+    op.create_table(ActivityRollup)
+    op.log("  ! fill it with: python rebuild_stats.py --rollups")
+
+
+@revision(14)
+def jobs(op):
+    """The background job queue (worker.py)."""
+    op.create_table(Job)
+
+
+@revision(15)
+def incremental_streaks(op):
+    """users.last_active_date, backfilled from the activity log, so streaks update incrementally."""
+    from reset_streaks import reset_broken_streaks
+
+    op.alter_table(User, add=['last_active_date'])
+    op.create_index(model_index(User, 'ix_users_last_active_date'))
+
+    latest = db.session.query(func.max(ActivityLog.date)).filter(ActivityLog.user_id == User.id).scalar_subquery()
+    op.backfill("users.last_active_date from the activity log", User.__table__,
+                lambda start, end: User.query.filter(User.last_active_date.is_(None), User.id >= start, User.id < end)
+                .update({User.last_active_date: latest}, synchronize_session=False))
+    op.run("reset broken streaks", lambda: f"{reset_broken_streaks()} reset")
+
+
+@revision(16)
+def weekly_plan_exercises_table(op):
+    """Weekly plan targets as rows instead of the target_exercises JSON column."""
+    op.create_table(weekly_plan_exercises)
+
+    def convert():
+        if 'target_exercises' not in op.columns('weekly_plans'):
+            return "no target_exercises column"
+        exercise_ids = {row[0] for row in db.session.query(Exercise.id)}
+        existing = set(db.session.query(weekly_plan_exercises.c.plan_id, weekly_plan_exercises.c.exercise_id))
+        rows = []
+        plans = db.session.execute(db.text(
+            'SELECT id, target_exercises FROM weekly_plans WHERE target_exercises IS NOT NULL'
+        )).all()
+        for plan_id, target_exercises in plans:
+            try:
+                target_ids = json.loads(target_exercises)
+            except ValueError:
+                continue
+            if not isinstance(target_ids, list):
+                continue
+            for exercise_id in dict.fromkeys(target_ids):
+                if exercise_id in exercise_ids and (plan_id, exercise_id) not in existing:
+                    rows.append({'plan_id': plan_id, 'exercise_id': exercise_id})
+        if rows:
+            db.session.execute(insert(weekly_plan_exercises), rows)
+        return f"{len(rows)} targets from {len(plans)} plans"
+
+    op.run("copy target_exercises JSON into weekly_plan_exercises", convert)
+
+
+@revision(17)
+def catalog_version(op):
+    """Version counter that tells app processes to reload the catalog snapshot."""
+    from catalog import bump_catalog_version
+
+    op.create_table(CatalogVersion)
+    op.run("bump the catalog version", bump_catalog_version)
+
+
+@revision(18)
+def completion_bitmaps(op):
+    """Per-user, per-book completion bitsets (built on first use, nothing to backfill)."""
+    op.create_table(CompletionBitmap)
+
+
+@revision(19)
+def user_badges(op):
+    """Awarded badges, backfilled by evaluating the rules for every user."""
+    from badges import award_badges_bulk
+
+    op.create_table(UserBadge)
+    op.run("award badges users already hold",
+           lambda: f"{award_badges_bulk([row[0] for row in db.session.query(User.id)])} awarded")
+
+
+@revision(20)
+def submission_indexes(op):
+    """Composite submission and exercise indexes, with a unique (user_id, exercise_id)."""
+    from leaderboard import rebuild_entries
+    from rollups import rebuild_rollups
+
+    def remove_duplicate_submissions():
+        """Delete all but the first submission of each (user, exercise) and take their points back."""
+        keep = db.session.query(func.min(Submission.id)).group_by(Submission.user_id, Submission.exercise_id)
+        duplicates = db.session.query(Submission.user_id, func.count(Submission.id),
+                                      func.coalesce(func.sum(Submission.points_earned), 0))\
+            .filter(Submission.id.not_in(keep)).group_by(Submission.user_id).all()
+        if not duplicates:
+            return "none"
+        for user_id, _, points in duplicates:
+            db.session.get(User, user_id).add_points(-points)
+        Submission.query.filter(Submission.id.not_in(keep)).delete(synchronize_session=False)
+        rebuild_entries()
+        rebuild_rollups()
+        return f"{sum(count for _, count, _ in duplicates)} removed"
+
+    op.run("remove duplicate submissions", remove_duplicate_submissions)
+    for index in list(Submission.__table__.indexes) + list(Exercise.__table__.indexes):
+        op.create_index(index)
+    op.drop_index('ix_submissions_user_id', 'submissions')
+    op.drop_index('ix_submissions_exercise_id', 'submissions')
+    op.drop_index('ix_exercises_chapter_id', 'exercises')
+    op.run("refresh planner statistics", lambda: db.session.execute(db.text('ANALYZE')))
+
+
+@revision(21)
+def points_ledger(op):
+    """The append-only points ledger, seeded with one event per submission and reading section."""
+    from ledger import reconcile, SUBMISSION, READING
+
+    op.create_table(PointsEvent)
+    columns = ['user_id', 'kind', 'points', 'exercise_id', 'chapter_id', 'section', 'book_id', 'created_at']
+
+    # Rows that already have their event (from an earlier, interrupted run) are skipped. Drivers only
+    # report how many rows an INSERT ... SELECT wrote when asked to (preserve_rowcount).
+    def submission_events(start, end):
+        recorded = exists().where(PointsEvent.kind == SUBMISSION, PointsEvent.user_id == Submission.user_id,
+                                  PointsEvent.exercise_id == Submission.exercise_id)
+        return db.session.execute(insert(PointsEvent.__table__).from_select(columns, select(
+            Submission.user_id, literal(SUBMISSION), Submission.points_earned, Submission.exercise_id,
+            Exercise.chapter_id, Exercise.section, Chapter.book_id, Submission.created_at
+        ).join(Exercise, Submission.exercise_id == Exercise.id)
+         .join(Chapter, Exercise.chapter_id == Chapter.id)
+         .where(Submission.id >= start, Submission.id < end, Submission.points_earned != 0, ~recorded)),
+            execution_options={'preserve_rowcount': True}).rowcount
+
+    def reading_events(start, end):
+        recorded = exists().where(PointsEvent.kind == READING, PointsEvent.user_id == ReadingSection.user_id,
+                                  and_(PointsEvent.chapter_id == ReadingSection.chapter_id,
+                                       PointsEvent.section == ReadingSection.section))
+        return db.session.execute(insert(PointsEvent.__table__).from_select(columns, select(
+            ReadingSection.user_id, literal(READING), ReadingSection.points_earned, literal(None),
+            ReadingSection.chapter_id, ReadingSection.section, Chapter.book_id, ReadingSection.created_at
+        ).join(Chapter, ReadingSection.chapter_id == Chapter.id)
+         .where(ReadingSection.id >= start, ReadingSection.id < end, ReadingSection.points_earned != 0,
+                ~recorded)), execution_options={'preserve_rowcount': True}).rowcount
+
+    op.backfill("submission events", Submission.__table__, submission_events)
+    op.backfill("reading section events", ReadingSection.__table__, reading_events)
+    op.run("compare totals with the ledger",
+           lambda: f"{len(reconcile())} user(s) drifted (see reconcile_points.py)")
+
+
+@revision(22)
+def drop_weekly_plan_target_json(op):
+    """Drop weekly_plans.target_exercises; revision 16 moved it into weekly_plan_exercises."""
+    op.alter_table(WeeklyPlan, drop=['target_exercises'])
+
+
+@revision(23)
+def job_leases(op):
+    """Lease on running jobs, so jobs of a worker that died are claimed again."""
+    op.alter_table(Job, add=['locked_until'])
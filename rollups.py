@@ -0,0 +1,107 @@
+"""
+Daily activity rollups: one user's exercises and points for one book on one day.
+
+Period statistics are a SUM over these rows instead of a COUNT over submissions.
+"""
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func
+
+from models import db, Book, Chapter, Exercise, Submission, ActivityRollup
+from leaderboard import period_starts, period_buckets
+from dbutils import insert_or_increment
+
+
+def record_activity(user_id, items):
+    """Add submitted exercises to the user's daily rollups.
+
+    `items` is an iterable of (created_at, exercise, points) for new submissions,
+    where each exercise is a catalog ExerciseInfo.
+    """
+    record_activity_bulk((user_id, created_at, exercise.book_id, exercise.category, points)
+                         for created_at, exercise, points in items)
+
+
+def record_activity_bulk(items):
+    """Add submissions to the daily rollups in one upsert (atomic under concurrent writers).
+    
+    `items` is an iterable of (user_id, created_at, book_id, category, points).
+    """
+    totals = defaultdict(lambda: [0, 0])
+    categories = {}
+    for user_id, created_at, book_id, category, points in items:
+        day = created_at.date() if created_at else date.today()
+        totals[(user_id, day, book_id)][0] += 1
+        totals[(user_id, day, book_id)][1] += points or 0
+        categories[book_id] = category
+
+    insert_or_increment(
+        ActivityRollup,
+        [
+            {
+                'user_id': user_id,
+                'date': day,
+                'book_id': book_id,
+                'category': categories[book_id],
+                'exercises': exercises,
+                'points': points
+            }
+            for (user_id, day, book_id), (exercises, points) in totals.items()
+        ],
+        keys=('user_id', 'date', 'book_id'),
+        counters=('exercises', 'points')
+    )
+
+
+def remove_book_activity(user_id, book_id):
+    """Drop a user's rollups for a book after its submissions were deleted."""
+    ActivityRollup.query.filter_by(user_id=user_id, book_id=book_id)\
+        .delete(synchronize_session=False)
+
+
+def get_period_stats(user_id, category=None, book_id=None):
+    """Get a user's exercise counts for this week, month and year in one query."""
+    _, _, year_start = period_starts()
+
+    query = db.session.query(*period_buckets(ActivityRollup.date, ActivityRollup.exercises))\
+        .filter(ActivityRollup.user_id == user_id, ActivityRollup.date >= year_start)
+    if category:
+        query = query.filter(ActivityRollup.category == category)
+    if book_id:
+        query = query.filter(ActivityRollup.book_id == book_id)
+
+    week, month, year = query.one()
+    return {'week': week, 'month': month, 'year': year}
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from the submissions table."""
+    day = func.date(Submission.created_at)
+    rows = db.session.query(
+        Submission.user_id,
+        day,
+        Chapter.book_id,
+        Book.category,
+        func.count(Submission.id),
+        func.coalesce(func.sum(Submission.points_earned), 0)
+    ).join(Exercise, Submission.exercise_id == Exercise.id)\
+        .join(Chapter, Exercise.chapter_id == Chapter.id)\
+        .join(Book, Chapter.book_id == Book.id)\
+        .group_by(Submission.user_id, day, Chapter.book_id, Book.category).all()
+
+    ActivityRollup.query.delete()
+
+    for user_id, day, book_id, category, exercises, points in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        db.session.add(ActivityRollup(
+            user_id=user_id,
+            date=day,
+            book_id=book_id,
+            category=category,
+            exercises=exercises,
+            points=points
+        ))
+
+    return len(rows)
@@ -0,0 +1,130 @@
+"""
+Read/write routing between the primary database and read replicas.
+
+Every entry of DATABASE_REPLICA_URLS becomes a "replica_N" bind in
+Config.SQLALCHEMY_BINDS. Replicas can be real database replicas or, on SQLite,
+the primary file opened read-only (mode=ro), which gives reads their own
+connection pool that can never take the write lock. db.session is a
+RoutingSession: inside replica_reads() (or a view decorated with
+@reads_from_replica) plain SELECTs go to a randomly chosen replica, and
+everything else (writes, SELECT ... FOR UPDATE, flushes) still goes to the
+primary.
+
+Replicas lag behind the primary, so reads stay on the primary when:
+  - the current request has already written something, or
+  - the current browser session wrote within READ_YOUR_WRITES_SECONDS
+    (after_request stamps the Flask session after a committed write), so a
+    user sees their own submission on the leaderboard right away
+"""
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+REPLICA_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    """db.session: SELECTs inside replica_reads() go to a replica, everything else to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if bind is None and replica is not None and not self.info.get('wrote') and not self._flushing \
+                and _is_plain_select(clause):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_plain_select(clause):
+    return clause is not None and getattr(clause, 'is_select', False) \
+        and getattr(clause, '_for_update_arg', None) is None
+
+
+# Track writes so the rest of the request, and the user's next few requests, read from the primary
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(db_session, flush_context):
+    db_session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(db_session):
+    if db_session.info.pop('wrote', False) and has_request_context():
+        g.db_written = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(db_session):
+    db_session.info.pop('wrote', None)
+
+
+def replica_engines():
+    """The current app's replica engines (empty without DATABASE_REPLICA_URLS)."""
+    engines = current_app.extensions['sqlalchemy'].engines
+    return [engine for key, engine in engines.items() if key and key.startswith(REPLICA_PREFIX)]
+
+
+def choose_replica(db_session):
+    """A replica engine for this block's reads, or None if they must stay on the primary."""
+    replicas = replica_engines()
+    if not replicas or db_session.info.get('wrote'):
+        return None
+    if has_request_context():
+        if g.get('db_written'):
+            return None
+        written_at = session.get('db_written_at')
+        if written_at and time.time() - written_at < current_app.config['READ_YOUR_WRITES_SECONDS']:
+            return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def replica_reads():
+    """Send the plain SELECTs of this block to a read replica when one can be used."""
+    db_session = current_app.extensions['sqlalchemy'].session()
+    previous = db_session.info.get('replica')
+    db_session.info['replica'] = choose_replica(db_session)
+    try:
+        yield
+    finally:
+        db_session.info['replica'] = previous
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside a replica_reads() block (e.g. version checks)."""
+    db_session = current_app.extensions['sqlalchemy'].session()
+    previous = db_session.info.pop('replica', None)
+    try:
+        yield
+    finally:
+        db_session.info['replica'] = previous
+
+
+def reads_from_replica(view):
+    """View decorator: run the whole view inside replica_reads()."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def init_routing(app):
+    """Remember when a browser session last wrote, for read-your-writes stickiness."""
+    @app.after_request
+    def stamp_database_write(response):
+        if g.get('db_written') and replica_engines():
+            session['db_written_at'] = time.time()
+        return response
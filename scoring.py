@@ -0,0 +1,82 @@
+"""
+Exercise and reading scoring rules.
+
+An exercise is worth its difficulty base (or the reading value, for the
+single "reading completion" exercise of a reading section) plus any
+last-in-section, section-complete and chapter-complete bonus, times a 5% per
+chapter multiplier, rounded to the nearest integer once at the end. The
+catalog stores every bonus combination per exercise (points_table) when it
+loads, so scoring a submission is a tuple lookup and the book page shows
+exactly what a submission earns.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+
+BASE_POINTS = {
+    'easy': 10,
+    'medium': 20,
+    'hard': 30
+}
+DEFAULT_BASE_POINTS = 10
+READING_POINTS = 25
+
+LAST_IN_SECTION_BONUS = 15
+SECTION_COMPLETE_BONUS = 50
+CHAPTER_COMPLETE_BONUS = 100
+
+CHAPTER_STEP = 0.05  # Chapter 1 = 1.0, Chapter 2 = 1.05, ...
+
+# Fixed values of one chapter, after its multiplier
+ChapterPoints = namedtuple('ChapterPoints', ['reading', 'last_in_section', 'section_complete', 'chapter_complete'])
+
+
+def chapter_multiplier(chapter_number):
+    return 1 + CHAPTER_STEP * (chapter_number - 1)
+
+
+def scale(points, chapter_number):
+    """Apply the chapter multiplier and round to the nearest integer."""
+    return int(round(points * chapter_multiplier(chapter_number)))
+
+
+def base_points(difficulty, is_reading=False):
+    """Unscaled points of an exercise before bonuses."""
+    if is_reading:
+        return READING_POINTS
+    return BASE_POINTS.get(difficulty, DEFAULT_BASE_POINTS)
+
+
+def variant(is_last_in_section=False, is_section_complete=False, is_chapter_complete=False):
+    """Index into a points_table for a combination of bonuses."""
+    return (1 if is_last_in_section else 0) | (2 if is_section_complete else 0) | (4 if is_chapter_complete else 0)
+
+
+@lru_cache(maxsize=None)
+def points_table(base, chapter_number):
+    """Points for all eight bonus combinations, indexed by variant()."""
+    return tuple(
+        scale(base
+              + (LAST_IN_SECTION_BONUS if index & 1 else 0)
+              + (SECTION_COMPLETE_BONUS if index & 2 else 0)
+              + (CHAPTER_COMPLETE_BONUS if index & 4 else 0), chapter_number)
+        for index in range(8)
+    )
+
+
+@lru_cache(maxsize=None)
+def chapter_points(chapter_number):
+    """The reading value and bonuses of a chapter, as shown on the book page."""
+    return ChapterPoints(
+        reading=scale(READING_POINTS, chapter_number),
+        last_in_section=scale(LAST_IN_SECTION_BONUS, chapter_number),
+        section_complete=scale(SECTION_COMPLETE_BONUS, chapter_number),
+        chapter_complete=scale(CHAPTER_COMPLETE_BONUS, chapter_number)
+    )
+
+
+def exercise_points(difficulty, chapter_number, is_last_in_section=False, is_section_complete=False,
+                    is_chapter_complete=False, is_reading=False):
+    """Points for one exercise, for callers without a catalog row."""
+    return points_table(base_points(difficulty, is_reading), chapter_number)[
+        variant(is_last_in_section, is_section_complete, is_chapter_complete)]
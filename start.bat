@@ -32,11 +32,13 @@ if not exist "instance\app.db" (
     echo Done!
     echo.
 ) else (
-    echo [4/5] Database already exists
+    echo [4/5] Database already exists, applying pending migrations...
+    python migrate.py
     echo.
 )
 
-echo [5/5] Starting Flask application...
+echo [5/5] Starting background worker and Flask application...
+start "MathTracker Worker" /B python worker.py
 echo.
 echo ============================================
 echo App will be available at: http://127.0.0.1:5000
@@ -32,11 +32,15 @@ if [ ! -f "instance/app.db" ]; then
     echo "Done!"
     echo ""
 else
-    echo "[4/5] Database already exists"
+    echo "[4/5] Database already exists, applying pending migrations..."
+    python migrate.py
     echo ""
 fi
 
-echo "[5/5] Starting Flask application..."
+echo "[5/5] Starting background worker and Flask application..."
+python worker.py &
+WORKER_PID=$!
+trap "kill $WORKER_PID" EXIT
 echo ""
 echo "============================================"
 echo "App will be available at: http://127.0.0.1:5000"
@@ -0,0 +1,163 @@
+"""
+Concurrency stress test for the submission endpoints.
+
+Many threads post overlapping mark-done batches and reading-section toggles
+for the same few users at once, then the totals are checked against the rows
+that were actually written:
+
+  - users.total_points == submission points + reading section points
+  - users.total_points == the user's points ledger sum
+  - leaderboard entry exercises/points match the submissions and the user
+  - activity log and daily rollup counts match the submissions
+
+Runs against a throwaway SQLite database unless --database-url is given (use
+an empty database; its tables are created). Requests that fail (for example
+SQLite's "database is locked") roll back as a whole and are only reported;
+any mismatch in the totals makes the script exit with status 1.
+
+Usage:
+    python stress_submissions.py [--users 3] [--threads 16] [--requests 40]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+from sqlalchemy import func
+
+from config import Config
+from app import create_app
+from models import db, User, Chapter, Submission, ReadingSection, ActivityLog, ActivityRollup, LeaderboardEntry
+from ledger import ledger_totals
+from leaderboard import get_entry
+from catalog import bump_catalog_version, get_catalog
+
+
+def make_users(count):
+    """Create the users the threads submit as; returns their usernames."""
+    usernames = []
+    for i in range(count):
+        user = User(username=f'stress{i}', email=f'stress{i}@example.com')
+        user.set_password('stress')
+        db.session.add(user)
+        db.session.flush()
+        get_entry(user.id)
+        usernames.append(user.username)
+    db.session.commit()
+    return usernames
+
+
+def worker(app, username, book, requests_per_thread, seed, statuses):
+    """Log in and fire a mix of mark-done batches and reading toggles."""
+    rng = random.Random(seed)
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': 'stress'})
+    exercise_ids = list(book.exercise_ids)
+    for _ in range(requests_per_thread):
+        try:
+            if rng.random() < 0.8:
+                batch = rng.sample(exercise_ids, min(len(exercise_ids), rng.randint(1, 8)))
+                response = client.post(f'/books/{book.slug}/mark-done', data={'exercises': batch})
+            else:
+                chapter_id = rng.choice(book.chapter_ids)
+                response = client.post(f'/books/{book.slug}/mark-reading/{chapter_id}/{rng.randint(1, 3)}')
+            statuses[response.status_code] += 1
+        except Exception as e:
+            # TESTING propagates view errors; count them like a 500
+            statuses[type(e).__name__] += 1
+
+
+def check_totals():
+    """Compare every user's denormalized totals with the rows; returns a list of problems."""
+    problems = []
+    submissions = {user_id: (count, points) for user_id, count, points in db.session.query(
+        Submission.user_id, func.count(Submission.id), func.coalesce(func.sum(Submission.points_earned), 0)
+    ).group_by(Submission.user_id)}
+    readings = dict(db.session.query(ReadingSection.user_id, func.sum(ReadingSection.points_earned))
+                    .group_by(ReadingSection.user_id).all())
+    activity = dict(db.session.query(ActivityLog.user_id, func.sum(ActivityLog.exercises_done))
+                    .group_by(ActivityLog.user_id).all())
+    rollups = {user_id: (exercises, points) for user_id, exercises, points in db.session.query(
+        ActivityRollup.user_id, func.sum(ActivityRollup.exercises), func.sum(ActivityRollup.points)
+    ).group_by(ActivityRollup.user_id)}
+    ledger = ledger_totals()
+
+    for user in User.query.order_by(User.id):
+        count, points = submissions.get(user.id, (0, 0))
+        expected_points = points + (readings.get(user.id) or 0)
+        entry = db.session.get(LeaderboardEntry, user.id)
+        checks = [
+            ('total_points', user.total_points or 0, expected_points),
+            ('ledger sum', ledger.get(user.id) or 0, user.total_points or 0),
+            ('leaderboard exercises', entry.total_exercises, count),
+            ('leaderboard points', entry.total_points, user.total_points or 0),
+            ('activity log exercises', activity.get(user.id) or 0, count),
+            ('rollup exercises', rollups.get(user.id, (0, 0))[0] or 0, count),
+            ('rollup points', rollups.get(user.id, (0, 0))[1] or 0, points),
+        ]
+        for label, actual, expected in checks:
+            if actual != expected:
+                problems.append(f'{user.username}: {label} is {actual}, expected {expected}')
+        print(f"  {user.username}: {count} submissions, {user.total_points} points")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hammer the submission endpoints from many threads.')
+    parser.add_argument('--users', type=int, default=3, help='Users shared by the threads (default 3)')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent threads (default 16)')
+    parser.add_argument('--requests', type=int, default=40, help='Requests per thread (default 40)')
+    parser.add_argument('--database-url', help='Empty database to use instead of a temporary SQLite file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url or 'sqlite:///' + os.path.join(workdir, 'stress.db')
+        UPLOAD_FOLDER = workdir
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        QUERY_STATS_LOG = False
+
+    app = create_app(StressConfig)
+    with app.app_context():
+        from init_db import seed_data
+
+        db.create_all()
+        seed_data()
+        # Give the exercises sections so reading toggles and section bonuses are exercised too
+        for chapter in Chapter.query.all():
+            for position, exercise in enumerate(sorted(chapter.exercises, key=lambda e: e.number)):
+                exercise.section = position % 3 + 1
+        bump_catalog_version()
+        db.session.commit()
+        book = get_catalog().books_by_title()[0]
+        usernames = make_users(args.users)
+
+    statuses = Counter()
+    threads = [
+        threading.Thread(target=worker, args=(app, usernames[i % len(usernames)], book, args.requests, i, statuses))
+        for i in range(args.threads)
+    ]
+    print(f"Running {args.threads} threads x {args.requests} requests against {args.users} users...")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"✓ Responses: {dict(statuses)}")
+
+    with app.app_context():
+        problems = check_totals()
+    if problems:
+        print("✗ Totals don't match:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("✓ All totals match the submissions")
+
+
+if __name__ == '__main__':
+    main()
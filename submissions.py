@@ -0,0 +1,92 @@
+"""
+Batch scoring for exercise submissions.
+
+Chapters come from the catalog snapshot, so scoring a batch needs only the
+user's completions in the affected chapters, and the new rows go in as one
+bulk INSERT that skips exercises a concurrent request already inserted.
+"""
+from models import db, Submission
+from catalog import get_catalog
+from dbutils import insert_ignore
+
+
+def _parse_ids(exercise_ids):
+    """Turn submitted form values into unique exercise ids, keeping their order."""
+    ids = []
+    for value in exercise_ids:
+        try:
+            ex_id = int(value)
+        except (TypeError, ValueError):
+            continue
+        if ex_id not in ids:
+            ids.append(ex_id)
+    return ids
+
+
+def score_batch(user_id, exercise_ids):
+    """Score the exercises a user is submitting.
+
+    Returns a list of (exercise, points) for the selected exercises the user has
+    not completed yet, in the order they were selected; the exercises are
+    catalog ExerciseInfo rows. Points include the last-in-section,
+    section-complete and chapter-complete bonuses this batch earns.
+    """
+    catalog = get_catalog()
+    ids = [ex_id for ex_id in _parse_ids(exercise_ids) if ex_id in catalog.exercises]
+    if not ids:
+        return []
+
+    # The only query: the user's existing completions in the touched chapters
+    chapter_ids = {catalog.exercises[ex_id].chapter_id for ex_id in ids}
+    chapter_exercise_ids = [ex_id for chapter_id in chapter_ids
+                            for ex_id in catalog.chapters[chapter_id].exercise_ids]
+    done_ids = {row[0] for row in db.session.query(Submission.exercise_id)
+                .filter(Submission.user_id == user_id, Submission.exercise_id.in_(chapter_exercise_ids))}
+
+    new_exercises = [catalog.exercises[ex_id] for ex_id in ids if ex_id not in done_ids]
+    if not new_exercises:
+        return []
+
+    completed_after = done_ids | {exercise.id for exercise in new_exercises}
+
+    def all_done(member_ids):
+        return all(member_id in completed_after for member_id in member_ids)
+
+    # Sections and chapters this batch completes
+    sections_completing = {(e.chapter_id, e.section) for e in new_exercises
+                           if e.section and all_done(catalog.chapters[e.chapter_id].sections[e.section])}
+    chapters_completing = {e.chapter_id for e in new_exercises
+                           if all_done(catalog.chapters[e.chapter_id].exercise_ids)}
+
+    scored = []
+    for exercise in new_exercises:
+        points = exercise.calculate_points(
+            is_last_in_section=exercise.is_last_in_section,
+            is_section_complete=(exercise.chapter_id, exercise.section) in sections_completing,
+            is_chapter_complete=exercise.chapter_id in chapters_completing
+        )
+        scored.append((exercise, points))
+
+    return scored
+
+
+def insert_submissions(user_id, scored, filename, created_at):
+    """Bulk-insert one Submission row per scored exercise.
+
+    Exercises another request completed in the meantime are skipped by the
+    unique (user_id, exercise_id) index instead of raising. Returns the
+    (exercise, points) pairs that were inserted, so only those get counted.
+    """
+    inserted = insert_ignore(Submission, [
+        {
+            'user_id': user_id,
+            'exercise_id': exercise.id,
+            'filename': filename,
+            'created_at': created_at,
+            'status': 'submitted',
+            'points_earned': points
+        }
+        for exercise, points in scored
+    ], keys=('user_id', 'exercise_id'), returning=('exercise_id',))
+    inserted_ids = {row.exercise_id for row in inserted}
+    return [(exercise, points) for exercise, points in scored if exercise.id in inserted_ids]
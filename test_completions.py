@@ -0,0 +1,67 @@
+"""Test that completion bitsets rebuilt on a read route are saved.
+
+Runs against a throwaway SQLite database:
+    python -m pytest test_completions.py
+"""
+import os
+import tempfile
+
+from config import Config
+
+
+def make_app(directory):
+    from app import create_app
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'app.db')
+        SQLALCHEMY_BINDS = {}
+        UPLOAD_FOLDER = os.path.join(directory, 'uploads')
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+
+    return create_app(TestConfig)
+
+
+def test_book_page_saves_rebuilt_bitset():
+    from init_db import seed_data
+    from catalog import get_catalog
+    from models import db, Book, Chapter, CompletionBitmap, Exercise, Submission, User
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(directory)
+        with app.app_context():
+            db.create_all()
+            seed_data()
+            user = User(username='alice', email='alice@example.com')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.flush()
+            book = Book.query.first()
+            exercises = Exercise.query.join(Chapter).filter(Chapter.book_id == book.id)\
+                .order_by(Exercise.id).limit(3).all()
+            # Written in bulk, so no bitmap row exists yet
+            for exercise in exercises:
+                db.session.add(Submission(user_id=user.id, exercise_id=exercise.id, filename='a.pdf'))
+            db.session.commit()
+            user_id, book_id, slug = user.id, book.id, book.slug
+            exercise_ids = [exercise.id for exercise in exercises]
+            assert db.session.get(CompletionBitmap, (user_id, book_id)) is None
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'alice', 'password': 'password'})
+        assert client.get(f'/books/{slug}').status_code == 200
+
+        with app.app_context():
+            row = db.session.get(CompletionBitmap, (user_id, book_id))
+            assert row is not None
+            catalog = get_catalog()
+            assert row.catalog_version == catalog.version
+            expected = sum(1 << catalog.exercises[exercise_id].bit for exercise_id in exercise_ids)
+            assert int.from_bytes(row.bits, 'little') == expected
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    test_book_page_saves_rebuilt_bitset()
+    print('✓ Rebuilt completion bitset was saved')
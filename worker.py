@@ -0,0 +1,41 @@
+"""
+Background worker for the job queue (bot simulation and new bot creation).
+
+Run alongside the web app:
+    python worker.py           # poll forever
+    python worker.py --once    # drain the queue and exit
+"""
+import argparse
+import time
+
+from app import create_app
+from jobs import run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process queued background jobs.')
+    parser.add_argument('--once', action='store_true', help='Process all due jobs, then exit')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        batch_size = app.config['JOB_BATCH_SIZE']
+        max_attempts = app.config['JOB_MAX_ATTEMPTS']
+        backoff = app.config['JOB_RETRY_BACKOFF']
+        lease = app.config['JOB_LEASE_SECONDS']
+        poll_interval = app.config['JOB_POLL_INTERVAL']
+        
+        print(f"Worker started (batch size {batch_size}, poll every {poll_interval}s)")
+        while True:
+            handled = run_batch(batch_size, max_attempts, backoff, lease)
+            if handled:
+                print(f"✓ Processed {handled} job(s)")
+                continue
+            if args.once:
+                break
+            time.sleep(poll_interval)
+
+
+if __name__ == '__main__':
+    main()